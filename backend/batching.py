@@ -0,0 +1,80 @@
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger("batching")
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item calls into small batches.
+
+    Callers block in submit() while a background thread gathers items for at
+    most `max_wait_ms` (or until `max_batch_size` items are waiting) and
+    hands them to `handler` as one list. `handler` must return one result
+    per item, in order. If a batch raises, its items are retried one at a
+    time so only the failing item's caller sees the error.
+    """
+
+    def __init__(self, handler, max_batch_size=32, max_wait_ms=5.0):
+        self.handler = handler
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, item):
+        """Queues one item and blocks until its batch has been processed."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.handler(items)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                # Retry one by one so a single bad item only fails its own caller
+                logger.warning("Micro-batch of %d items failed (%s); retrying items individually.", len(items), e)
+                self._run_each(batch)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _run_each(self, batch):
+        for item, future in batch:
+            try:
+                future.set_result(self.handler([item])[0])
+            except Exception as e:
+                future.set_exception(e)
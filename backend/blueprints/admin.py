@@ -1,12 +1,21 @@
 import logging
 import os
+import threading
 import pytz
-from flask import Blueprint, request, jsonify, send_from_directory, current_app
+from flask import Blueprint, Response, request, jsonify, send_from_directory, current_app, stream_with_context
 from datetime import datetime
 
-from backend.storage import list_complaints, update_complaint, get_complaint
-from backend.router import get_level1_department
-from database.models import db
+from backend.storage import (
+    update_complaint, read_complaint, page_complaints, iter_complaint_rows,
+    delete_complaint as remove_complaint, get_stats,
+    list_departments, save_department, delete_department,
+    COMPLAINT_FILTERS, LIST_PAGE_SIZE, DEPARTMENT_LEVELS,
+)
+from backend.export import EXPORT_COLUMNS, ndjson_chunks, csv_chunks, gzip_chunks
+from backend.router import get_level1_department, reload_routing, check_departments, ROUTING_SOURCE
+from backend.classifier import reload_models, retrain_and_reload
+from backend import profiler
+from database.models import db, Department
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -20,6 +29,16 @@ ist = pytz.timezone("Asia/Kolkata")
 ADMIN_KEY = os.getenv("ADMIN_KEY", "default_admin_key")
 MODIFY_KEY = os.getenv("MODIFY_KEY", "default_modify_key")
 
+# Rows fetched per server-side cursor round trip during exports
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Columns shown in the admin panel table
+ADMIN_LIST_COLUMNS = ("complaint_id", "user_input", "created_at", "status", "assigned_to")
+
+EXPORT_FORMATS = {
+    "ndjson": (ndjson_chunks, "application/x-ndjson"),
+    "csv": (csv_chunks, "text/csv"),
+}
+
 
 def to_ist(dt):
     if not dt:
@@ -34,6 +53,11 @@ def to_ist(dt):
 def admin_page():
     return send_from_directory(current_app.static_folder, "admin.html")
 
+def has_read_key():
+    """True if the request carries the admin or modify key (X-Admin-Key header or ?key=)."""
+    key = request.headers.get("X-Admin-Key") or request.args.get("key")
+    return key in (ADMIN_KEY, MODIFY_KEY)
+
 # ---------------- API Routes ---------------- #
 
 @admin_bp.route("/verify_key", methods=["POST"])
@@ -64,7 +88,7 @@ def update_complaint_details():
     }
 
     if "category" in updates or "subcategory" in updates:
-        complaint = get_complaint(complaint_id)
+        complaint = read_complaint(complaint_id)
         if complaint:
             new_assigned_to = get_level1_department(
                 updates.get("category", complaint.category),
@@ -108,12 +132,9 @@ def delete_complaint():
         return jsonify({"error": "Invalid modification key"}), 401
 
     try:
-        complaint = get_complaint(complaint_id)
-        if not complaint:
+        if not remove_complaint(complaint_id):
             return jsonify({"error": "Complaint not found"}), 404
 
-        db.session.delete(complaint)
-        db.session.commit()
         return jsonify({"success": True, "message": f"Complaint {complaint_id} deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -123,19 +144,276 @@ def delete_complaint():
 
 @admin_bp.route("/all_complaints", methods=["GET"])
 def all_complaints():
-    """Return all complaints for admin panel display."""
+    """
+    Return one page of complaints for admin panel display, newest first.
+    Query params: limit, cursor (from next_cursor) and the COMPLAINT_FILTERS.
+    """
+    filters = {name: request.args[name] for name in COMPLAINT_FILTERS if request.args.get(name)}
     try:
-        complaints = list_complaints()
-        return jsonify([
-            {
-                "complaint_id": c.complaint_id,
-                "user_input": c.user_input,
-                "created_at": c.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                "status": c.status,
-                "assigned_to": c.assigned_to,
-            }
-            for c in complaints
-        ]), 200
+        complaints, next_cursor = page_complaints(
+            ADMIN_LIST_COLUMNS, request.args.get("limit", LIST_PAGE_SIZE), request.args.get("cursor"), **filters
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        return jsonify({
+            "complaints": [
+                {
+                    "complaint_id": c.complaint_id,
+                    "user_input": c.user_input,
+                    "created_at": c.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                    "status": c.status,
+                    "assigned_to": c.assigned_to,
+                }
+                for c in complaints
+            ],
+            "next_cursor": next_cursor,
+        }), 200
     except Exception as e:
         logger.exception("Failed to list complaints: %s", e)
-        return jsonify({"error": "Failed to load complaints"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to load complaints"}), 500
+
+
+@admin_bp.route("/stats", methods=["GET"])
+def stats():
+    """
+    Dashboard counts by status, category, urgency and department, plus
+    daily submissions for the last ?days= days (default 30, max 366).
+    Served from the maintained complaint_stats table.
+    """
+    if not has_read_key():
+        return jsonify({"error": "Invalid key"}), 401
+
+    try:
+        days = max(1, min(int(request.args.get("days", 30)), 366))
+    except ValueError:
+        return jsonify({"error": "days must be an integer"}), 400
+
+    try:
+        return jsonify(get_stats(days)), 200
+    except Exception as e:
+        logger.exception("Failed to load stats: %s", e)
+        return jsonify({"error": "Failed to load statistics"}), 500
+
+
+@admin_bp.route("/export_complaints", methods=["GET"])
+def export_complaints():
+    """
+    Streams every complaint (optionally filtered) as NDJSON or CSV.
+    Query params: key (admin or modify key), format=ndjson|csv, gzip=true,
+    and the COMPLAINT_FILTERS. Rows are written as they are read, so memory
+    use does not grow with the table.
+    """
+    if not has_read_key():
+        return jsonify({"error": "Invalid key"}), 401
+
+    export_format = request.args.get("format", "ndjson").lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(EXPORT_FORMATS)}"}), 400
+    serialize, mimetype = EXPORT_FORMATS[export_format]
+
+    filters = {name: request.args[name] for name in COMPLAINT_FILTERS if request.args.get(name)}
+    chunks = serialize(iter_complaint_rows(EXPORT_COLUMNS, EXPORT_BATCH_SIZE, **filters))
+
+    filename = f"complaints.{export_format}"
+    if request.args.get("gzip", "false").lower() == "true":
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        mimetype = "application/gzip"
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@admin_bp.route("/reload_models", methods=["POST"])
+def reload_ml_models():
+    """
+    Hot-swaps the published model version in this worker.
+    With "retrain": true, trains a new version in the background first.
+    """
+    data = request.json
+    modify_key = data.get("modify_key")
+
+    if modify_key != MODIFY_KEY:
+        return jsonify({"error": "Invalid modification key"}), 401
+
+    if data.get("retrain"):
+        threading.Thread(target=retrain_and_reload, name="model-retrain", daemon=True).start()
+        return jsonify({"success": True, "message": "Retraining started in the background"}), 202
+
+    try:
+        version = reload_models(force=bool(data.get("force")))
+        return jsonify({"success": True, "version": version}), 200
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.exception("Model reload error: %s", e)
+        return jsonify({"error": "Failed to reload models"}), 500
+
+
+@admin_bp.route("/reload_routing", methods=["POST"])
+def reload_routing_table():
+    """
+    Recompiles the routing table from ROUTING_SOURCE and swaps it in for
+    this worker: the departments table ("database", the default) or
+    config/routing.json ("file"). With the file source, also reports where
+    routing.json and the departments table disagree.
+    """
+    data = request.json
+    modify_key = data.get("modify_key")
+
+    if modify_key != MODIFY_KEY:
+        return jsonify({"error": "Invalid modification key"}), 401
+
+    try:
+        compiled = reload_routing()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    payload = {"success": True, "source": ROUTING_SOURCE, "routes": len(compiled.routes)}
+    if ROUTING_SOURCE == "file":
+        payload["mismatches"] = check_departments(Department.query.all())
+    return jsonify(payload), 200
+
+
+def department_payload(department):
+    return {
+        "dept_id": department.dept_id,
+        "category": department.category,
+        "subcategory": department.subcategory,
+        **{column: getattr(department, column) for column in DEPARTMENT_LEVELS},
+    }
+
+
+@admin_bp.route("/departments", methods=["GET"])
+def get_departments():
+    if not has_read_key():
+        return jsonify({"error": "Invalid key"}), 401
+    return jsonify({
+        "source": ROUTING_SOURCE,
+        "departments": [department_payload(department) for department in list_departments()],
+    }), 200
+
+
+@admin_bp.route("/save_department", methods=["POST"])
+def save_department_route():
+    """
+    Creates or updates the routing for one (category, subcategory); use
+    subcategory "default" for a category's fallback. Other workers pick the
+    change up within ROUTING_WATCH_SECONDS.
+    """
+    data = request.json
+    modify_key = data.get("modify_key")
+
+    if modify_key != MODIFY_KEY:
+        return jsonify({"error": "Invalid modification key"}), 401
+
+    category = (data.get("category") or "").strip()
+    subcategory = (data.get("subcategory") or "").strip()
+    if not category or not subcategory:
+        return jsonify({"error": "Category and subcategory are required"}), 400
+
+    levels = {column: (data[column] or "").strip() or None for column in DEPARTMENT_LEVELS if column in data}
+    invalid = [column for column, email in levels.items() if email and "@" not in email]
+    if invalid:
+        return jsonify({"error": f"Invalid email for {', '.join(invalid)}"}), 400
+
+    try:
+        department = save_department(category, subcategory, levels)
+        payload = department_payload(department)
+        if ROUTING_SOURCE == "database":
+            reload_routing()
+        return jsonify({"success": True, "department": payload}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Department save error: %s", e)
+        return jsonify({"error": "Failed to save department"}), 500
+
+
+@admin_bp.route("/delete_department", methods=["POST"])
+def delete_department_route():
+    data = request.json
+    modify_key = data.get("modify_key")
+    dept_id = data.get("dept_id")
+
+    if modify_key != MODIFY_KEY:
+        return jsonify({"error": "Invalid modification key"}), 401
+    if not dept_id:
+        return jsonify({"error": "Department ID required"}), 400
+
+    try:
+        if not delete_department(dept_id):
+            return jsonify({"error": "Department not found"}), 404
+        if ROUTING_SOURCE == "database":
+            reload_routing()
+        return jsonify({"success": True, "message": f"Department {dept_id} deleted"}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Department delete error: %s", e)
+        return jsonify({"error": "Failed to delete department"}), 500
+
+
+@admin_bp.route("/profiler/start", methods=["POST"])
+def start_profiler():
+    """
+    Profiles requests in the worker that serves this call, for up to
+    "seconds" or "requests" (optionally only "endpoint", e.g. "user.predict").
+    Collect the result from the same worker with /profiler/stop.
+    """
+    data = request.json
+    modify_key = data.get("modify_key")
+
+    if modify_key != MODIFY_KEY:
+        return jsonify({"error": "Invalid modification key"}), 401
+
+    try:
+        requests_limit = data.get("requests")
+        session = profiler.start_session(
+            mode=data.get("mode", "sample"),
+            seconds=float(data.get("seconds", 30)),
+            requests=int(requests_limit) if requests_limit is not None else None,
+            endpoint=data.get("endpoint"),
+            interval_ms=float(data.get("interval_ms", profiler.PROFILE_SAMPLE_INTERVAL_MS)),
+        )
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"success": True, "seconds": session.seconds, **session.summary()}), 202
+
+
+@admin_bp.route("/profiler/stop", methods=["POST"])
+def stop_profiler():
+    """
+    Ends profiling in this worker and returns the result: collapsed stacks
+    for "sample" sessions, and for "cprofile" sessions a pstats file
+    (format "pstats", the default) or the top functions as text ("text").
+    """
+    data = request.json
+    modify_key = data.get("modify_key")
+
+    if modify_key != MODIFY_KEY:
+        return jsonify({"error": "Invalid modification key"}), 401
+
+    session = profiler.stop_session()
+    if session is None:
+        return jsonify({"error": "No profiling session in this worker"}), 404
+
+    headers = {f"X-Profile-{key.title()}": str(value) for key, value in session.summary().items()}
+    if session.mode == "sample":
+        return Response(session.collapsed(), mimetype="text/plain", headers=headers)
+
+    if data.get("format") == "text":
+        import io
+        import pstats
+        out = io.StringIO()
+        pstats.Stats(session.profile, stream=out).sort_stats("cumulative").print_stats(50)
+        return Response(out.getvalue(), mimetype="text/plain", headers=headers)
+
+    headers["Content-Disposition"] = f"attachment; filename=profile-{os.getpid()}.pstats"
+    return Response(session.pstats(), mimetype="application/octet-stream", headers=headers)
@@ -1,14 +1,25 @@
-import uuid
+import os
+import json
 import pytz
 import logging
 from datetime import datetime
 from flask import Blueprint, request, jsonify, send_from_directory, current_app
+from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError
 
-from database.models import db
-from backend.router import get_level1_department, get_level2_department
-from backend.storage import save_complaint, get_complaint, get_status_logs, list_complaints
-from backend.classifier import classify_complaint_text
+from database.models import db, Complaint
+from backend.router import get_route, get_level1_department, get_level2_department
+from backend.storage import (
+    save_complaint, bulk_save_complaints, new_complaint_id, is_complaint_id_collision,
+    read_complaint_with_logs, page_complaints, status_cache, COMPLAINT_FILTERS, LIST_PAGE_SIZE,
+)
+from backend.classifier import classify_complaint_text, classify_batch, ModelsNotReadyError
+from backend.batching import MicroBatcher
 from backend.relay import relay_email, tag_subject
+from backend.ids import normalize_complaint_id
+
+# Load environment variables
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 ist = pytz.timezone("Asia/Kolkata")
@@ -16,6 +27,32 @@ ist = pytz.timezone("Asia/Kolkata")
 # Blueprint (no template folder now)
 user_bp = Blueprint("user", __name__)
 
+# Prediction batching settings
+PREDICT_BATCH_LIMIT = int(os.getenv("PREDICT_BATCH_LIMIT", "500"))
+PREDICT_MICROBATCH = os.getenv("PREDICT_MICROBATCH", "false").lower() == "true"
+PREDICT_MICROBATCH_MAX_SIZE = int(os.getenv("PREDICT_MICROBATCH_MAX_SIZE", "32"))
+PREDICT_MICROBATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_MICROBATCH_MAX_WAIT_MS", "5"))
+
+# Gathers concurrent /predict calls into one vectorized classify_batch() call
+predict_batcher = (
+    MicroBatcher(classify_batch, PREDICT_MICROBATCH_MAX_SIZE, PREDICT_MICROBATCH_MAX_WAIT_MS)
+    if PREDICT_MICROBATCH else None
+)
+
+# Bulk ingestion settings
+INGEST_KEY = os.getenv("INGEST_KEY") or os.getenv("MODIFY_KEY", "default_modify_key")
+INGEST_MAX_ROWS = int(os.getenv("INGEST_MAX_ROWS", "200000"))
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "5000"))
+# Fresh IDs drawn when a new complaint's ID is already taken
+ID_COLLISION_RETRIES = 2
+MAX_COMPLAINT_LENGTH = Complaint.__table__.c.user_input.type.length
+
+# Columns returned by /list_complaints
+USER_LIST_COLUMNS = (
+    "complaint_id", "user_input", "created_at", "status", "category",
+    "subcategory", "urgency", "assigned_to",
+)
+
 # ---------------- Utility Functions ---------------- #
 
 def calculate_eta_message(urgency):
@@ -33,6 +70,21 @@ def to_ist(dt):
         dt = pytz.utc.localize(dt)
     return dt.astimezone(ist).isoformat()
 
+def build_prediction(complaint_text, classification):
+    category = classification["category"]
+    subcategory = classification["subcategory"]
+    urgency = classification["urgency"]
+    route = get_route(category, subcategory)
+    return {
+        "complaint_text": complaint_text,
+        "category": category,
+        "subcategory": subcategory,
+        "urgency": urgency,
+        "eta_message": calculate_eta_message(urgency),
+        "assigned_to": route.level1,
+        "escalation_email": route.level2,
+    }
+
 # ---------------- Frontend Routes ---------------- #
 
 @user_bp.route("/")
@@ -49,28 +101,43 @@ def track():
 def predict():
     data = request.json
     complaint_text = data.get("complaint_text")
-    if not complaint_text:
+    if not isinstance(complaint_text, str) or not complaint_text:
         return jsonify({"error": "Complaint text is required"}), 400
 
     try:
-        classification = classify_complaint_text(complaint_text)
-        category = classification["category"]
-        subcategory = classification["subcategory"]
-        urgency = classification["urgency"]
+        if predict_batcher is not None:
+            classification = predict_batcher.submit(complaint_text)
+        else:
+            classification = classify_complaint_text(complaint_text)
 
-        return jsonify({
-            "complaint_text": complaint_text,
-            "category": category,
-            "subcategory": subcategory,
-            "urgency": urgency,
-            "eta_message": calculate_eta_message(urgency),
-            "assigned_to": get_level1_department(category, subcategory),
-            "escalation_email": get_level2_department(category, subcategory),
-        }), 200
+        return jsonify(build_prediction(complaint_text, classification)), 200
+
+    except ModelsNotReadyError:
+        logger.error("Prediction error: models not loaded")
+        return jsonify({"error": "Prediction models are not ready yet. Please try again shortly."}), 503
+
+
+@user_bp.route("/predict_batch", methods=["POST"])
+def predict_batch():
+    data = request.json
+    complaint_texts = data.get("complaint_texts")
+    if not isinstance(complaint_texts, list) or not complaint_texts:
+        return jsonify({"error": "A non-empty list of complaint texts is required"}), 400
+    if len(complaint_texts) > PREDICT_BATCH_LIMIT:
+        return jsonify({"error": f"At most {PREDICT_BATCH_LIMIT} complaints per batch"}), 400
+    if not all(isinstance(t, str) and t for t in complaint_texts):
+        return jsonify({"error": "Every complaint text must be a non-empty string"}), 400
+
+    try:
+        classifications = classify_batch(complaint_texts)
+        return jsonify([
+            build_prediction(text, classification)
+            for text, classification in zip(complaint_texts, classifications)
+        ]), 200
 
-    except ValueError:
+    except ModelsNotReadyError:
         logger.error("Prediction error: models not loaded")
-        return jsonify({"error": "Prediction models not loaded. Please train first."}), 500
+        return jsonify({"error": "Prediction models are not ready yet. Please try again shortly."}), 503
 
 
 @user_bp.route("/submit", methods=["POST"])
@@ -85,35 +152,47 @@ def submit():
     if not all([complaint_text, urgency, category, subcategory, assigned_to]):
         return jsonify({"error": "Missing required data"}), 400
 
-    complaint_id = str(uuid.uuid4()).split("-")[0].upper()
-
     try:
-        new_complaint = save_complaint(
-            complaint_id, complaint_text, category, subcategory, urgency, assigned_to
-        )
-
         from backend.email_templates import build_complaint_email
-        from backend.email_sender import get_email_sender
         from backend.router import get_level2_department, get_eta_message
+        from backend import mail_queue
 
-        email_sender = get_email_sender()
-        eta_message = get_eta_message(new_complaint.urgency)
+        eta_message = get_eta_message(urgency)
 
-        display_email = new_complaint.assigned_to
+        display_email = assigned_to
         to_email = relay_email(display_email)
 
-        subject, body = build_complaint_email({
-            "complaint_id": new_complaint.complaint_id,
-            "category": new_complaint.category,
-            "subcategory": new_complaint.subcategory,
-            "urgency": new_complaint.urgency,
-            "user_input": complaint_text,
-            "assigned_to": display_email,
-            "eta_message": eta_message,
-        })
+        # The ID is in the email, so a collision rebuilds both
+        for attempt in range(ID_COLLISION_RETRIES + 1):
+            complaint_id = new_complaint_id()
+            subject, body = build_complaint_email({
+                "complaint_id": complaint_id,
+                "category": category,
+                "subcategory": subcategory,
+                "urgency": urgency,
+                "user_input": complaint_text,
+                "assigned_to": display_email,
+                "eta_message": eta_message,
+            })
 
-        subject = tag_subject(subject)
-        email_sender.send_email(subject, body, to_email)
+            subject = tag_subject(subject)
+
+            # The notification is queued in the same transaction as the complaint
+            # and delivered by the mail queue workers, off the request path.
+            # High urgency complaints skip the digest window.
+            try:
+                new_complaint = save_complaint(
+                    complaint_id, complaint_text, category, subcategory, urgency, assigned_to,
+                    notifications=[(to_email, subject, body)],
+                    notification_delay=0 if urgency == "High" else mail_queue.MAIL_DIGEST_WINDOW_SECONDS,
+                )
+                break
+            except IntegrityError as e:
+                db.session.rollback()
+                if attempt == ID_COLLISION_RETRIES or not is_complaint_id_collision(e):
+                    raise
+                logger.warning("Complaint ID collision on submit; retrying with a new ID.")
+        mail_queue.notify()
 
         return jsonify({
             "success": True,
@@ -135,14 +214,146 @@ def submit():
         return jsonify({"error": "Internal error during submission"}), 500
 
 
+def parse_bulk_items(req):
+    """
+    Reads a bulk body: NDJSON (application/x-ndjson) or a JSON array. Each
+    item is a complaint text or an object with "complaint_text". Returns a
+    list of (text, error) pairs, one per item, or None for an invalid body.
+    """
+    if req.mimetype == "application/x-ndjson":
+        items = []
+        for line in req.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(ValueError("Invalid JSON line"))
+    else:
+        items = req.get_json(silent=True)
+        if not isinstance(items, list):
+            return None
+
+    parsed = []
+    for item in items:
+        if isinstance(item, Exception):
+            parsed.append((None, str(item)))
+            continue
+        text = item.get("complaint_text") if isinstance(item, dict) else item
+        if not isinstance(text, str) or not text.strip():
+            parsed.append((None, "Complaint text is required"))
+        elif len(text) > MAX_COMPLAINT_LENGTH:
+            parsed.append((None, f"Complaint text is longer than {MAX_COMPLAINT_LENGTH} characters"))
+        else:
+            parsed.append((text.strip(), None))
+    return parsed
+
+
+def ingest_chunk(texts, notify=True):
+    """
+    Classifies, routes and stores one chunk of complaint texts in a single
+    transaction. Returns the complaint IDs, in order.
+    """
+    from backend.email_templates import build_complaint_email
+    from backend.router import get_eta_message
+    from backend import mail_queue
+
+    complaints = []
+    for text, classification in zip(texts, classify_batch(texts)):
+        complaint = {
+            "complaint_id": None,
+            "user_input": text,
+            "category": classification["category"],
+            "subcategory": classification["subcategory"],
+            "urgency": classification["urgency"],
+            "assigned_to": get_level1_department(classification["category"], classification["subcategory"]),
+        }
+        complaints.append(complaint)
+
+    # IDs from two processes sharing a node (or the random scheme) can
+    # collide; the whole chunk is rolled back, so draw fresh IDs and try again
+    for attempt in range(ID_COLLISION_RETRIES + 1):
+        notifications = []
+        for complaint in complaints:
+            complaint["complaint_id"] = new_complaint_id()
+            if notify:
+                subject, body = build_complaint_email({**complaint, "eta_message": get_eta_message(complaint["urgency"])})
+                notifications.append(
+                    (complaint["complaint_id"], relay_email(complaint["assigned_to"]), tag_subject(subject), body)
+                )
+        try:
+            # Bulk loads always go through the digest window, so a department
+            # gets one email per window rather than one per complaint
+            bulk_save_complaints(complaints, notifications, notification_delay=mail_queue.MAIL_DIGEST_WINDOW_SECONDS)
+            break
+        except IntegrityError as e:
+            if attempt == ID_COLLISION_RETRIES or not is_complaint_id_collision(e):
+                raise
+            logger.warning("Complaint ID collision during bulk ingest; retrying the chunk.")
+
+    if notifications:
+        mail_queue.notify()
+    return [complaint["complaint_id"] for complaint in complaints]
+
+
+@user_bp.route("/bulk_submit", methods=["POST"])
+def bulk_submit():
+    """
+    Ingests many complaints at once for partner portals. Texts are
+    classified in vectorized batches and stored INGEST_CHUNK_SIZE rows per
+    transaction. Pass ?notify=false to skip department emails.
+    Responds with one {"index", "complaint_id"} or {"index", "error"} per item.
+    """
+    if request.headers.get("X-Ingest-Key") != INGEST_KEY:
+        return jsonify({"error": "Invalid ingest key"}), 401
+
+    items = parse_bulk_items(request)
+    if items is None:
+        return jsonify({"error": "Body must be a JSON array or NDJSON"}), 400
+    if not items:
+        return jsonify({"error": "No complaints to ingest"}), 400
+    if len(items) > INGEST_MAX_ROWS:
+        return jsonify({"error": f"At most {INGEST_MAX_ROWS} complaints per request"}), 400
+
+    notify = request.args.get("notify", "true").lower() != "false"
+    results = [
+        {"index": i, "error": error} if error else None
+        for i, (_, error) in enumerate(items)
+    ]
+    valid = [i for i, (_, error) in enumerate(items) if not error]
+
+    for start in range(0, len(valid), INGEST_CHUNK_SIZE):
+        indexes = valid[start:start + INGEST_CHUNK_SIZE]
+        try:
+            complaint_ids = ingest_chunk([items[i][0] for i in indexes], notify)
+            for i, complaint_id in zip(indexes, complaint_ids):
+                results[i] = {"index": i, "complaint_id": complaint_id}
+        except ModelsNotReadyError:
+            return jsonify({"error": "Prediction models are not ready yet. Please try again shortly."}), 503
+        except Exception as e:
+            logger.exception("Bulk ingest chunk failed: %s", e)
+            for i in indexes:
+                results[i] = {"index": i, "error": "Failed to store complaint"}
+
+    accepted = sum(1 for result in results if "complaint_id" in result)
+    return jsonify({"accepted": accepted, "rejected": len(results) - accepted, "results": results}), 200
+
+
 @user_bp.route("/get_status/<complaint_id>", methods=["GET"])
 def get_status(complaint_id):
-    complaint = get_complaint(complaint_id)
+    """
+    Tracking page payload. Served from status_cache when possible; a miss
+    costs one joined query for the complaint and its status history.
+    """
+    payload = status_cache.get(normalize_complaint_id(complaint_id))
+    if payload is not None:
+        return jsonify(payload), 200
+
+    complaint, logs = read_complaint_with_logs(complaint_id)
     if not complaint:
         return jsonify({"error": "Complaint not found"}), 404
 
-    logs = get_status_logs(complaint_id)
-    return jsonify({
+    payload = {
         "complaint_id": complaint.complaint_id,
         "complaint_text": complaint.user_input,
         "status": complaint.status,
@@ -150,6 +361,7 @@ def get_status(complaint_id):
         "subcategory": complaint.subcategory,
         "urgency": complaint.urgency,
         "assigned_to": complaint.assigned_to,
+        "escalation_level": complaint.escalation_level,
         "submitted_at": to_ist(complaint.created_at),
         "eta_message": calculate_eta_message(complaint.urgency),
         "escalation_email": get_level2_department(complaint.category, complaint.subcategory),
@@ -157,23 +369,39 @@ def get_status(complaint_id):
             {"status": log.status, "assigned_to": log.assigned_to, "timestamp": to_ist(log.timestamp)}
             for log in logs
         ],
-    }), 200
+    }
+    status_cache.set(normalize_complaint_id(complaint_id), payload)
+    return jsonify(payload), 200
 
 
 @user_bp.route("/list_complaints", methods=["GET"])
 def list_all_complaints():
-    complaints = list_complaints()
-    return jsonify([
-        {
-            "complaint_id": c.complaint_id,
-            "user_input": c.user_input,
-            "submitted_at": to_ist(c.created_at),
-            "status": c.status,
-            "category": c.category,
-            "subcategory": c.subcategory,
-            "urgency": c.urgency or "Unknown",
-            "assigned_to": c.assigned_to,
-            "eta_message": calculate_eta_message(c.urgency or "Unknown"),
-        }
-        for c in complaints
-    ])
\ No newline at end of file
+    """
+    One page of complaints, newest first. Query params: limit, cursor
+    (from next_cursor) and the COMPLAINT_FILTERS.
+    """
+    filters = {name: request.args[name] for name in COMPLAINT_FILTERS if request.args.get(name)}
+    try:
+        complaints, next_cursor = page_complaints(
+            USER_LIST_COLUMNS, request.args.get("limit", LIST_PAGE_SIZE), request.args.get("cursor"), **filters
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "complaints": [
+            {
+                "complaint_id": c.complaint_id,
+                "user_input": c.user_input,
+                "submitted_at": to_ist(c.created_at),
+                "status": c.status,
+                "category": c.category,
+                "subcategory": c.subcategory,
+                "urgency": c.urgency or "Unknown",
+                "assigned_to": c.assigned_to,
+                "eta_message": calculate_eta_message(c.urgency or "Unknown"),
+            }
+            for c in complaints
+        ],
+        "next_cursor": next_cursor,
+    })
\ No newline at end of file
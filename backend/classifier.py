@@ -1,114 +1,410 @@
 import os
+import re
+import json
+import signal
+import hashlib
 import logging
-import joblib
-import subprocess
-from pathlib import Path
-from paths import TRAINED_DATA_DIR, SUBCATEGORY_MODELS_DIR, ML_MODELS_DIR
+import threading
+from functools import lru_cache
 
+import numpy as np
+from dotenv import load_dotenv
+
+from backend.cache import TTLCache
+from backend.metrics import timed
+from ml_models.versions import current_version_dir
+
+load_dotenv()
 logger = logging.getLogger("classifier")
 
-# Global model placeholders
-cat_model = None
-urg_model = None
-subcategory_models = {}
+# Same tokenization as sklearn's default CountVectorizer (lowercase, 2+ word chars)
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
 
+# Live model set, filled lazily by get_engine() or warm_up(). Reloads build a
+# complete new CompiledScorer and swap it in with one reference assignment,
+# so a request that already grabbed the old one finishes on it untouched.
+engine = None
 
-def train_models():
+# Model lifecycle: "not_loaded" -> "training" -> "loading" -> "ready" (or "error")
+model_state = "not_loaded"
+model_error = None
+_load_lock = threading.Lock()
+_train_lock = threading.Lock()
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
+
+
+# Repeated complaint texts skip tokenization and scoring entirely
+prediction_cache = TTLCache(
+    maxsize=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PREDICTION_CACHE_TTL", "3600")),
+)
+
+
+class ModelsNotReadyError(RuntimeError):
+    """Raised when a prediction is requested before the models are available."""
+
+
+def murmurhash3_32(data: bytes, seed: int = 0) -> int:
+    """Signed 32-bit MurmurHash3 (x86), matching sklearn.utils.murmurhash3_32."""
+    c1, c2, mask = 0xCC9E2D51, 0x1B873593, 0xFFFFFFFF
+    h = seed & mask
+    length = len(data)
+    rounded = length & ~3
+
+    for i in range(0, rounded, 4):
+        k = int.from_bytes(data[i:i + 4], "little")
+        k = (k * c1) & mask
+        k = ((k << 15) | (k >> 17)) & mask
+        h ^= (k * c2) & mask
+        h = ((h << 13) | (h >> 19)) & mask
+        h = (h * 5 + 0xE6546B64) & mask
+
+    k = 0
+    tail = length & 3
+    if tail == 3:
+        k ^= data[rounded + 2] << 16
+    if tail >= 2:
+        k ^= data[rounded + 1] << 8
+    if tail >= 1:
+        k ^= data[rounded]
+        k = (k * c1) & mask
+        k = ((k << 15) | (k >> 17)) & mask
+        h ^= (k * c2) & mask
+
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & mask
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & mask
+    h ^= h >> 16
+    return h - (1 << 32) if h & 0x80000000 else h
+
+
+@lru_cache(maxsize=65536)
+def hash_bucket(token: str, n_features: int) -> int:
+    """Bucket HashingVectorizer(alternate_sign=False) assigns to `token`."""
+    h = murmurhash3_32(token.encode("utf-8"))
+    if h == -(1 << 31):
+        return (2147483647 - (n_features - 1)) % n_features
+    return abs(h) % n_features
+
+
+class CompiledHead:
+    """TF-IDF weights and MultinomialNB log-probabilities for one head."""
+
+    __slots__ = ("classes", "idf", "feature_log_prob", "class_log_prior")
+
+    def __init__(self, classes, idf, feature_log_prob, class_log_prior):
+        self.classes = classes
+        self.idf = idf
+        self.feature_log_prob = feature_log_prob
+        self.class_log_prior = class_log_prior
+
+    def predict(self, doc_ids, columns, counts, n_docs):
+        """
+        Scores documents given as flat (doc_id, column, count) triples.
+        Returns the index of the winning class for each of the `n_docs` docs.
+        """
+        weights = counts * self.idf[columns]
+        norms = np.sqrt(np.bincount(doc_ids, weights=weights * weights, minlength=n_docs))
+        norms[norms == 0.0] = 1.0
+        weights = weights / norms[doc_ids]
+
+        scores = np.empty((n_docs, len(self.classes)))
+        for k, log_prob in enumerate(self.feature_log_prob):
+            scores[:, k] = np.bincount(doc_ids, weights=weights * log_prob[columns], minlength=n_docs)
+        scores += self.class_log_prior
+        return scores.argmax(axis=1)
+
+
+class CompiledScorer:
     """
-    Automatically runs trainall.py if trained models are missing.
-    Adds project root to PYTHONPATH so 'paths' can be imported correctly.
+    NumPy-only scorer for the model store exported by trainall.compile_store().
+
+    All arrays, including the sorted vocabulary, are memory-mapped read-only,
+    so worker processes share the same page-cache copy and loading costs no
+    more than reading the manifest. Texts are tokenized once; every head
+    then scores the same flat count arrays without sklearn, scipy or pandas.
     """
-    train_script = ML_MODELS_DIR / "trainall.py"
 
-    if not train_script.exists():
-        logger.error("❌ Training script not found at %s", train_script)
-        return False
+    def __init__(self, vocabulary, heads, subcategory_heads, version=None, hash_features=None):
+        self.vocabulary = vocabulary
+        self.heads = heads
+        self.subcategory_heads = subcategory_heads
+        self.version = version
+        # Set for stores trained by ml_models.streaming, whose vocabulary
+        # holds sorted hash buckets instead of terms
+        self.hash_features = hash_features
 
-    logger.warning("⚠️ Models missing. Running trainall.py automatically...")
+    @classmethod
+    def load(cls, store_dir):
+        with open(store_dir / "manifest.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
 
-    try:
-        # ✅ Ensure Python can import 'paths' by adding project root to PYTHONPATH
-        project_root = Path(__file__).resolve().parents[1]
-        env = os.environ.copy()
-        env["PYTHONPATH"] = str(project_root)
-
-        subprocess.run(
-            ["python", str(train_script)],
-            check=True,
-            cwd=ML_MODELS_DIR,  # run from ml_models folder
-            env=env
+        vocabulary = np.load(store_dir / "vocabulary.npy", mmap_mode="r")
+        idf = np.load(store_dir / "idf.npy", mmap_mode="r")
+        feature_log_prob = np.load(store_dir / "feature_log_prob.npy", mmap_mode="r")
+        class_log_prior = np.load(store_dir / "class_log_prior.npy", mmap_mode="r")
+
+        heads, subcategory_heads = {}, {}
+        for i, spec in enumerate(manifest["heads"]):
+            rows = slice(spec["offset"], spec["offset"] + len(spec["classes"]))
+            head = CompiledHead(
+                np.array(spec["classes"]), idf[i], feature_log_prob[rows], class_log_prior[rows]
+            )
+            if spec["name"].startswith("subcategory:"):
+                subcategory_heads[spec["name"].split(":", 1)[1]] = head
+            else:
+                heads[spec["name"]] = head
+        features = manifest.get("features", {"type": "vocabulary"})
+        hash_features = features["n_features"] if features["type"] == "hashing" else None
+        return cls(vocabulary, heads, subcategory_heads, version=store_dir.name, hash_features=hash_features)
+
+    def _count(self, texts):
+        """
+        Tokenizes texts into flat (doc_id, column, count) arrays sorted by
+        document and column. Terms are matched against the sorted vocabulary
+        with a binary search, so no per-process lookup dict is needed.
+        """
+        tokens, doc_ids = [], []
+        for doc_id, text in enumerate(texts):
+            found = TOKEN_PATTERN.findall(text.lower())
+            tokens.extend(found)
+            doc_ids.extend([doc_id] * len(found))
+
+        if not tokens:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty, np.empty(0, dtype=np.float64)
+
+        if self.hash_features:
+            tokens = np.array([hash_bucket(token, self.hash_features) for token in tokens], dtype=np.int64)
+        else:
+            tokens = np.array(tokens)
+        columns = np.searchsorted(self.vocabulary, tokens)
+        columns[columns == len(self.vocabulary)] = 0
+        known = self.vocabulary[columns] == tokens
+
+        n_features = len(self.vocabulary)
+        keys, counts = np.unique(
+            np.array(doc_ids, dtype=np.intp)[known] * n_features + columns[known], return_counts=True
         )
+        return keys // n_features, keys % n_features, counts.astype(np.float64)
 
-        logger.info("✅ Model retraining completed successfully.")
-        return True
+    def predict_batch(self, texts):
+        """
+        Scores a list of texts in one pass.
+        Subcategory heads only see the entries of rows predicted for their
+        category, so each one runs once per batch.
+        """
+        if not texts:
+            return []
 
-    except subprocess.CalledProcessError as e:
-        logger.error("❌ Model training failed: %s", e)
-        return False
+        n_docs = len(texts)
+        doc_ids, columns, counts = self._count(texts)
+
+        category_head = self.heads["category"]
+        category_idx = category_head.predict(doc_ids, columns, counts, n_docs)
+        categories = category_head.classes[category_idx].tolist()
+
+        urgency_head = self.heads["urgency"]
+        urgencies = urgency_head.classes[urgency_head.predict(doc_ids, columns, counts, n_docs)].tolist()
+
+        subcategories = [None] * n_docs
+        for k, category in enumerate(category_head.classes.tolist()):
+            subcat_head = self.subcategory_heads.get(category.lower())
+            rows = np.flatnonzero(category_idx == k)
+            if not subcat_head or not len(rows):
+                continue
+            mask = category_idx[doc_ids] == k
+            predicted = subcat_head.predict(doc_ids[mask], columns[mask], counts[mask], n_docs)
+            for i in rows.tolist():
+                subcategories[i] = subcat_head.classes[predicted[i]].item()
+
+        return list(zip(categories, subcategories, urgencies))
 
+    def predict(self, text: str):
+        return self.predict_batch([text])[0]
 
-def load_models():
+
+def _set_state(state, error=None):
+    global model_state, model_error
+    model_state = state
+    model_error = error
+
+
+def models_available():
+    version_dir = current_version_dir()
+    return version_dir is not None and (version_dir / "manifest.json").exists()
+
+
+def train_models():
     """
-    Loads trained models. If missing, triggers auto-training.
+    Trains and publishes a new model version in-process through
+    ml_models.trainall. sklearn and pandas are imported here only, never on
+    the request path.
     """
-    global cat_model, urg_model, subcategory_models
+    with _train_lock:
+        from ml_models import trainall
 
-    try:
-        # Ensure directories exist
-        if not TRAINED_DATA_DIR.exists():
-            logger.warning("Trained data directory missing: %s", TRAINED_DATA_DIR)
-            TRAINED_DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-        cat_path = TRAINED_DATA_DIR / "category_model.pkl"
-        urg_path = TRAINED_DATA_DIR / "urgency_model.pkl"
-
-        # ✅ Auto-train if models are missing
-        if not (cat_path.exists() and urg_path.exists()):
-            trained = train_models()
-            if not trained:
-                raise FileNotFoundError("Required model files not found and auto-train failed.")
-
-        # Load category and urgency models
-        cat_model = joblib.load(cat_path)
-        urg_model = joblib.load(urg_path)
-
-        # Load subcategory models
-        subcategory_models.clear()
-        if SUBCATEGORY_MODELS_DIR.exists():
-            for filename in os.listdir(SUBCATEGORY_MODELS_DIR):
-                if filename.endswith(".pkl"):
-                    category = filename.split("_", 1)[-1].replace(".pkl", "")
-                    model_path = SUBCATEGORY_MODELS_DIR / filename
-                    subcategory_models[category.lower()] = joblib.load(model_path)
-
-        logger.info("✅ Models loaded successfully. Subcategories: %s", list(subcategory_models.keys()))
+        logger.warning("⚠️ Training models...")
+        try:
+            trainall.train_all()
+            logger.info("✅ Model training completed successfully.")
+            return True
+        except Exception as e:
+            logger.exception("❌ Model training failed: %s", e)
+            return False
+
+
+def load_models(force=False):
+    """
+    Opens the current model version and swaps it in as the live set.
+    Skips the work if that version is already live, unless `force` is set.
+    Never trains; raises FileNotFoundError when nothing has been published.
+    """
+    global engine
 
+    with _load_lock:
+        version_dir = current_version_dir()
+        if version_dir is None or not (version_dir / "manifest.json").exists():
+            raise FileNotFoundError("No published model version found")
+
+        if engine is not None and engine.version == version_dir.name and not force:
+            return engine
+
+        if engine is None:
+            _set_state("loading")
+        try:
+            new_engine = CompiledScorer.load(version_dir)
+        except Exception as e:
+            logger.exception("❌ Unexpected error while loading models: %s", e)
+            _set_state("error" if engine is None else "ready", str(e))
+            raise
+
+        engine = new_engine
+        prediction_cache.clear()
+        _set_state("ready")
+        logger.info(
+            "✅ Models %s loaded successfully. Subcategories: %s",
+            engine.version, list(engine.subcategory_heads.keys()),
+        )
+        return engine
+
+
+def reload_models(force=False):
+    """Re-reads CURRENT and hot-swaps the live model set if it changed."""
+    previous = engine.version if engine is not None else None
+    current = load_models(force=force)
+    if current.version != previous:
+        logger.info("🔄 Model version %s -> %s", previous, current.version)
+    return current.version
+
+
+def retrain_and_reload():
+    """Trains a new version and hot-swaps it in. Meant for background threads."""
+    if train_models():
+        reload_models()
+
+
+def get_engine():
+    """Returns the loaded scorer, loading it on first use."""
+    if engine is not None:
+        return engine
+    try:
+        return load_models()
     except FileNotFoundError as e:
-        logger.error("❌ Model loading error: %s", e)
-        raise
+        raise ModelsNotReadyError(str(e)) from e
+
+
+def _warm_up(train_if_missing):
+    try:
+        if not models_available():
+            if not train_if_missing:
+                _set_state("error", "No published model version found")
+                return
+            _set_state("training")
+            if not train_models():
+                _set_state("error", "Model training failed")
+                return
+        load_models()
     except Exception as e:
-        logger.exception("❌ Unexpected error while loading models: %s", e)
-        raise
+        _set_state("error", str(e))
 
 
-def classify_complaint_text(text: str):
+def warm_up(train_if_missing=True):
     """
-    Runs classification using loaded models.
-    Automatically reloads if models are missing.
+    Loads the models in a background thread, training them first if no
+    version exists yet, so app boot never waits on either step. Only one
+    warm-up runs per process; later calls return the running thread.
     """
-    global cat_model, urg_model, subcategory_models
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is not None and _warm_up_thread.is_alive():
+            return _warm_up_thread
+        _warm_up_thread = threading.Thread(
+            target=_warm_up, args=(train_if_missing,), name="model-warm-up", daemon=True
+        )
+        _warm_up_thread.start()
+        return _warm_up_thread
 
-    if cat_model is None or urg_model is None:
-        logger.warning("⚠️ Models not loaded in memory. Reloading...")
-        load_models()
 
-    category = cat_model.predict([text])[0]
-    urgency = urg_model.predict([text])[0]
+def install_reload_signal(signum=getattr(signal, "SIGHUP", None)):
+    """
+    Reloads models when the process receives `signum` (SIGHUP by default).
+    The handler only starts a thread; loading happens off the signal frame.
+    """
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def _handle(signum, frame):
+        threading.Thread(target=_safe_reload, name="model-reload", daemon=True).start()
 
-    subcategory = None
-    subcat_model = subcategory_models.get(category.lower())
-    if subcat_model:
-        subcategory = subcat_model.predict([text])[0]
+    signal.signal(signum, _handle)
+    return True
+
+
+def _safe_reload():
+    try:
+        reload_models()
+    except Exception as e:
+        logger.error("❌ Model reload failed: %s", e)
+
+
+def model_status():
+    return {
+        "ready": engine is not None,
+        "state": model_state,
+        "error": model_error,
+        "version": engine.version if engine is not None else None,
+        "prediction_cache": prediction_cache.stats(),
+    }
+
+
+def cache_key(text, version):
+    """
+    Keys a prediction by model version and the text's token sequence.
+    Texts that differ only in case, punctuation or spacing tokenize the same
+    way, so they share one entry without changing any prediction.
+    """
+    normalized = " ".join(TOKEN_PATTERN.findall(text.lower()))
+    return version, hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+@timed("classify")
+def classify_complaint_text(text: str):
+    """
+    Runs classification using loaded models.
+    Raises ModelsNotReadyError if they are not available yet.
+    """
+    current = get_engine()
+    key = cache_key(text, current.version)
+    prediction = prediction_cache.get(key)
+    if prediction is None:
+        prediction = current.predict(text)
+        prediction_cache.set(key, prediction)
+
+    category, subcategory, urgency = prediction
 
     return {
         "category": category,
@@ -117,5 +413,26 @@ def classify_complaint_text(text: str):
     }
 
 
-# ✅ Load models on import (auto-trains if missing)
-load_models()
\ No newline at end of file
+@timed("classify.batch")
+def classify_batch(texts):
+    """
+    Classifies many complaint texts in one vectorized pass.
+    Cached texts are answered directly; only the misses are scored.
+    Returns one result dict per input text, in the same order.
+    """
+    current = get_engine()
+    texts = list(texts)
+    keys = [cache_key(text, current.version) for text in texts]
+    predictions = [prediction_cache.get(key) for key in keys]
+
+    misses = [i for i, prediction in enumerate(predictions) if prediction is None]
+    if misses:
+        scored = current.predict_batch([texts[i] for i in misses])
+        for i, prediction in zip(misses, scored):
+            predictions[i] = prediction
+            prediction_cache.set(keys[i], prediction)
+
+    return [
+        {"category": category, "subcategory": subcategory, "urgency": urgency}
+        for category, subcategory, urgency in predictions
+    ]
@@ -1,22 +1,45 @@
 import os
+import time
 import smtplib
 import logging
+import threading
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from backend.relay import tag_subject
+from backend.metrics import timed
 
 logger = logging.getLogger(__name__)
 
+_sender = None
+_sender_lock = threading.Lock()
+
+
 def get_email_sender():
-    smtp_server = os.getenv("SMTP_SERVER")
-    smtp_port = os.getenv("SMTP_PORT")
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_password = os.getenv("SMTP_PASSWORD")
+    """Returns the process-wide sender, built from the environment on first use."""
+    global _sender
+    if _sender is not None:
+        return _sender
+
+    with _sender_lock:
+        if _sender is None:
+            smtp_server = os.getenv("SMTP_SERVER")
+            smtp_port = os.getenv("SMTP_PORT")
+            smtp_user = os.getenv("SMTP_USER")
+            smtp_password = os.getenv("SMTP_PASSWORD")
+
+            if not all([smtp_server, smtp_port, smtp_user, smtp_password]):
+                logger.warning("Email environment variables are not set. Using mock sender.")
+                _sender = MockEmailSender()
+            else:
+                _sender = RealEmailSender(
+                    smtp_server, smtp_port, smtp_user, smtp_password,
+                    security=os.getenv("SMTP_SECURITY", "starttls").lower(),
+                    pool_size=int(os.getenv("SMTP_POOL_SIZE", "2")),
+                    idle_timeout=float(os.getenv("SMTP_IDLE_TIMEOUT", "60")),
+                )
+    return _sender
 
-    if not all([smtp_server, smtp_port, smtp_user, smtp_password]):
-        logger.warning("Email environment variables are not set. Using mock sender.")
-        return MockEmailSender()
-    return RealEmailSender(smtp_server, smtp_port, smtp_user, smtp_password)
 
 class MockEmailSender:
     def send_email(self, subject: str, body: str, to_email: str):
@@ -24,31 +47,150 @@ class MockEmailSender:
         logger.info(f"MOCK EMAIL SENT\nTo: {to_email}\nSubject: {subject}\nBody: {body}")
         return True
 
+    def send_many(self, messages):
+        return [self.send_email(subject, body, to_email) for subject, body, to_email in messages]
+
+
+class SMTPSession:
+    """
+    One borrowed pool slot. Opens its connection lazily and reconnects once
+    if the server has dropped it (e.g. an idle timeout on the server side).
+    """
+
+    def __init__(self, pool, conn=None):
+        self.pool = pool
+        self.conn = conn
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = self.pool.open_connection()
+            try:
+                return self.conn.sendmail(from_addr, to_addrs, msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self.pool.close_connection(self.conn)
+                self.conn = None
+                if attempt == 2:
+                    raise
+
+
+class SMTPConnectionPool:
+    """
+    Keeps up to `size` authenticated SMTP connections open between messages,
+    so the TCP, TLS and login handshakes are paid once per connection rather
+    than once per email. Idle connections older than `idle_timeout` seconds
+    are closed instead of reused.
+    """
+
+    def __init__(self, server, port, user, password, security="starttls", size=2, idle_timeout=60.0, timeout=30.0):
+        self.server = server
+        self.port = int(port)
+        self.user = user
+        self.password = password
+        self.security = security
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle = []  # (connection, last_used)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+
+    @timed("email.connect")
+    def open_connection(self):
+        if self.security == "ssl":
+            conn = smtplib.SMTP_SSL(self.server, self.port, timeout=self.timeout)
+        else:
+            conn = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+            if self.security == "starttls":
+                conn.starttls()
+        conn.ehlo_or_helo_if_needed()
+        if self.user and conn.has_extn("auth"):
+            conn.login(self.user, self.password)
+        with self._lock:
+            self.connections_opened += 1
+        return conn
+
+    @staticmethod
+    def close_connection(conn):
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    def _take_idle(self):
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if time.monotonic() - last_used < self.idle_timeout:
+                    return conn
+                self.close_connection(conn)
+        return None
+
+    @contextmanager
+    def session(self):
+        self._slots.acquire()
+        session = SMTPSession(self, self._take_idle())
+        try:
+            yield session
+        except BaseException:
+            if session.conn is not None:
+                self.close_connection(session.conn)
+            raise
+        else:
+            if session.conn is not None:
+                with self._lock:
+                    self._idle.append((session.conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self.close_connection(conn)
+
+
 class RealEmailSender:
-    def __init__(self, smtp_server, smtp_port, smtp_user, smtp_password):
+    def __init__(self, smtp_server, smtp_port, smtp_user, smtp_password,
+                 security="starttls", pool_size=2, idle_timeout=60.0):
         self.server = smtp_server
         self.port = int(smtp_port)
         self.user = smtp_user
         self.password = smtp_password
+        self.pool = SMTPConnectionPool(
+            smtp_server, smtp_port, smtp_user, smtp_password,
+            security=security, size=pool_size, idle_timeout=idle_timeout,
+        )
 
-    def send_email(self, subject: str, body: str, to_email: str):
-        try:
-            subject = tag_subject(subject)
-
-            msg = MIMEMultipart()
-            msg["From"] = self.user
-            msg["To"] = to_email
-            msg["Subject"] = subject
-            msg.attach(MIMEText(body, "plain"))
-
-            with smtplib.SMTP(self.server, self.port) as server:
-                server.starttls()
-                server.login(self.user, self.password)
-                server.sendmail(self.user, to_email, msg.as_string())
+    def _build_message(self, subject, body, to_email):
+        msg = MIMEMultipart()
+        msg["From"] = self.user
+        msg["To"] = to_email
+        msg["Subject"] = tag_subject(subject)
+        msg.attach(MIMEText(body, "plain"))
+        return msg.as_string()
 
+    def _send(self, session, subject, body, to_email):
+        try:
+            session.sendmail(self.user, to_email, self._build_message(subject, body, to_email))
             logger.info(f"✅ Email sent successfully to {to_email}")
             return True
-
         except Exception as e:
             logger.error(f"❌ Failed to send email to {to_email}: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def send_email(self, subject: str, body: str, to_email: str):
+        return self.send_many([(subject, body, to_email)])[0]
+
+    @timed("email.send")
+    def send_many(self, messages):
+        """
+        Sends (subject, body, to_email) messages over one pooled session.
+        Returns one success flag per message.
+        """
+        try:
+            with self.pool.session() as session:
+                return [self._send(session, subject, body, to_email) for subject, body, to_email in messages]
+        except Exception as e:
+            logger.error(f"❌ SMTP session failed: {e}")
+            return [False] * len(messages)
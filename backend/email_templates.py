@@ -2,8 +2,11 @@
 from datetime import datetime
 import pytz
 
+from backend.metrics import timed
+
 ist = pytz.timezone("Asia/Kolkata")
 
+@timed("email.render")
 def build_complaint_email(complaint):
     """
     Builds a subject and plain-text email body for complaint notifications.
@@ -35,4 +38,54 @@ Thank you,
 **Smart Complaint Box System**
     """.strip()
 
-    return subject, body
\ No newline at end of file
+    return subject, body
+
+def build_digest_email(messages):
+    """
+    Combines several (subject, body) notifications for the same department
+    into one digest email.
+    """
+    subject = f"[Smart Complaint Box] {len(messages)} new complaints"
+    separator = "\n\n" + "─" * 40 + "\n\n"
+    body = separator.join(f"{msg_subject}\n\n{msg_body}" for msg_subject, msg_body in messages)
+    return subject, body
+
+
+def build_escalation_email(complaint, level, overdue_hours):
+    """
+    Builds the notification sent when an unresolved complaint is escalated
+    to a higher level.
+    """
+    subject = (
+        f"[Smart Complaint Box] ESCALATED to Level {level}: Complaint #{complaint['complaint_id']}"
+        f" – {complaint['category']} | {complaint['subcategory']}"
+    )
+    submitted_at = complaint["created_at"]
+    if submitted_at.tzinfo is None:
+        submitted_at = pytz.utc.localize(submitted_at)
+
+    body = f"""
+Dear {complaint['assigned_to'].split('@')[0].replace('.', ' ').title()},  
+
+The following complaint has not been resolved within its deadline and has been escalated to you (Level {level}).  
+
+📄 **Complaint Details:**  
+• Complaint ID: {complaint['complaint_id']}  
+• Category: {complaint['category']}  
+• Subcategory: {complaint['subcategory']}  
+• Urgency: {complaint['urgency']}  
+• Current Status: {complaint['status']}  
+• Previously Assigned To: {complaint['previous_assignee']}  
+• Submitted At: {submitted_at.astimezone(ist).strftime("%d-%m-%Y %I:%M %p")}  
+• Overdue By: {overdue_hours:.0f} hours  
+
+🗣️ **User Complaint Text:**  
+"{complaint['user_input']}"  
+
+Please take necessary action and update the system once resolved.  
+
+Thank you,  
+**Smart Complaint Box System**
+    """.strip()
+
+    return subject, body
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from datetime import timedelta
+
+import pytz
+from dotenv import load_dotenv
+
+from paths import ESCALATION_CONFIG_PATH
+from database.models import db
+from backend.storage import now_utc, find_overdue, escalate_complaints
+from backend.email_templates import build_escalation_email
+from backend.relay import relay_email, tag_subject
+from backend import router, mail_queue
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process scans, which escalate_complaints() tolerates
+    fcntl = None
+
+load_dotenv()
+logger = logging.getLogger("escalation")
+
+ESCALATION_ENABLED = os.getenv("ESCALATION_ENABLED", "true").lower() == "true"
+ESCALATION_SCAN_SECONDS = float(os.getenv("ESCALATION_SCAN_SECONDS", "60"))
+# Complaints escalated per transaction
+ESCALATION_BATCH_SIZE = int(os.getenv("ESCALATION_BATCH_SIZE", "200"))
+# Only the worker holding this lock scans; one file per host
+ESCALATION_LOCK_FILE = Path(os.getenv(
+    "ESCALATION_LOCK_FILE", Path(tempfile.gettempdir()) / "smart_complaint_box-escalation.lock"
+))
+
+DEFAULT_CONFIG = {
+    "open_statuses": ["Pending", "In Progress"],
+    "deadlines_hours": {
+        "High": {"level2": 4, "level3": 12},
+        "Medium": {"level2": 24, "level3": 72},
+        "Low": {"level2": 72, "level3": 168},
+    },
+}
+
+# Levels a complaint can be escalated to; level N is assigned to the
+# route's levelN email
+ESCALATION_LEVELS = (2, 3)
+
+_scheduler = []
+_lock_file = None
+
+
+def load_escalation_config():
+    if ESCALATION_CONFIG_PATH.exists():
+        try:
+            with open(ESCALATION_CONFIG_PATH, "r", encoding="utf-8") as f:
+                return {**DEFAULT_CONFIG, **json.load(f)}
+        except Exception as e:
+            logger.error("Failed to load escalation config: %s", e)
+    return DEFAULT_CONFIG
+
+
+CONFIG = load_escalation_config()
+
+
+def _as_utc(dt):
+    return pytz.utc.localize(dt) if dt.tzinfo is None else dt
+
+
+def build_escalation(row, level, now, deadline_hours):
+    """The (row, level, assignee, notification) tuple escalate_complaints() expects."""
+    assignee = router.get_route(row.category, row.subcategory)[level - 1]
+    overdue = (now - _as_utc(row.created_at)).total_seconds() / 3600 - deadline_hours
+    subject, body = build_escalation_email(
+        {**row._asdict(), "assigned_to": assignee, "previous_assignee": row.assigned_to},
+        level, overdue,
+    )
+    return row, level, assignee, (relay_email(assignee), tag_subject(subject), body)
+
+
+def _escalate_overdue(status, urgency, from_level, level, cutoff, now, deadline_hours, batch_size):
+    total = 0
+    while True:
+        rows = find_overdue(status, urgency, from_level, cutoff, batch_size)
+        if not rows:
+            return total
+        escalated = escalate_complaints([build_escalation(row, level, now, deadline_hours) for row in rows])
+        total += len(escalated)
+        # Escalated rows leave this level, so the next query
+        # starts at the following batch
+        if len(rows) < batch_size or not escalated:
+            return total
+
+
+def scan_once(now=None, batch_size=ESCALATION_BATCH_SIZE, config=None):
+    """
+    Escalates every open complaint that has passed a deadline straight to
+    the highest level it is due for, so one past both deadlines goes to
+    level 3 in one step. Each (status, urgency, level) combination is one
+    index range scan for complaints submitted before its cutoff, so a scan
+    with nothing overdue reads no rows. Returns how many complaints were
+    escalated.
+    """
+    config = config or CONFIG
+    now = now or now_utc()
+    total = 0
+
+    for urgency, deadlines in config["deadlines_hours"].items():
+        # Highest level first; the lower passes then only see complaints
+        # that are not yet due for it
+        for level in sorted(ESCALATION_LEVELS, reverse=True):
+            hours = deadlines.get(f"level{level}")
+            if hours is None:
+                continue
+            cutoff = now - timedelta(hours=hours)
+            for status in config["open_statuses"]:
+                for from_level in range(1, level):
+                    total += _escalate_overdue(status, urgency, from_level, level, cutoff, now, hours, batch_size)
+
+    if total:
+        logger.info("⏫ Escalated %d overdue complaint(s).", total)
+        mail_queue.notify()
+    return total
+
+
+def _is_leader():
+    """
+    True once this process holds ESCALATION_LOCK_FILE. Every worker keeps
+    trying, so another one takes over when the holder exits.
+    """
+    global _lock_file
+    if _lock_file is not None or fcntl is None:
+        return True
+    lock_file = open(ESCALATION_LOCK_FILE, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _lock_file = lock_file
+    logger.info("⏰ This process now runs the escalation scans (pid %d).", os.getpid())
+    return True
+
+
+def _run(app):
+    while True:
+        if _is_leader():
+            try:
+                with app.app_context():
+                    scan_once()
+            except Exception as e:
+                logger.exception("Escalation scan error: %s", e)
+                with app.app_context():
+                    db.session.rollback()
+        time.sleep(ESCALATION_SCAN_SECONDS)
+
+
+def start_scheduler(app):
+    """
+    Starts the background escalation thread (once per process). Threads in
+    several workers on one host take turns through ESCALATION_LOCK_FILE.
+    """
+    if _scheduler or not ESCALATION_ENABLED:
+        return _scheduler
+    thread = threading.Thread(target=_run, args=(app,), name="escalation", daemon=True)
+    thread.start()
+    _scheduler.append(thread)
+    logger.info("⏰ Escalation scheduler started (every %.0fs).", ESCALATION_SCAN_SECONDS)
+    return _scheduler
+
+
+def main():
+    """
+    Standalone scheduler for deployments that set ESCALATION_ENABLED=false on
+    the web workers: python -m backend.escalation
+    """
+    os.environ["BACKGROUND_SERVICES"] = "false"
+    from main import app, create_database
+    # Run as a script this module is __main__; use the copy the app imported
+    from backend import escalation
+
+    create_database()
+    logger.info("⏰ Running escalation scans in the foreground (Ctrl+C to stop).")
+    escalation._run(app)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import io
+import csv
+import json
+import zlib
+
+# Columns written by the complaint export, in order
+EXPORT_COLUMNS = [
+    "complaint_id", "user_input", "category", "subcategory", "urgency",
+    "status", "assigned_to", "created_at", "updated_at",
+]
+
+# Rows serialized per yielded chunk
+EXPORT_CHUNK_ROWS = 500
+
+
+def _values(row):
+    return [value.isoformat() if hasattr(value, "isoformat") else value for value in row]
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_chunks(rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """One JSON object per line, EXPORT_COLUMNS as keys."""
+    for batch in _batches(rows, chunk_rows):
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, _values(row))), ensure_ascii=False) + "\n"
+            for row in batch
+        )
+
+
+def csv_chunks(rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """A header line, then one CSV record per row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in _batches(rows, chunk_rows):
+        writer.writerows(_values(row) for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip-compresses a stream of text chunks without buffering it whole."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,132 @@
+import os
+import time
+import uuid
+import random
+import secrets
+import logging
+import threading
+import importlib
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger("ids")
+
+# "sortable" (time-ordered), "random" (legacy 8 hex chars), or "module:function"
+COMPLAINT_ID_SCHEME = os.getenv("COMPLAINT_ID_SCHEME", "sortable")
+
+# Crockford base32: no I, L, O or U, so IDs survive being read aloud or retyped
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_CROCKFORD_ALIASES = str.maketrans({"O": "0", "I": "1", "L": "1"})
+
+# Sortable layout, 100 bits = 20 base32 characters:
+#   42 bits milliseconds since ID_EPOCH_MS (good for ~139 years)
+#   13 bits node (one per process)
+#   10 bits sequence within the millisecond
+#   35 random bits, so knowing one ID (or the time) doesn't reveal others;
+#   /get_status shows a complaint to anyone holding its ID
+ID_EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+NODE_BITS = 13
+SEQUENCE_BITS = 10
+RANDOM_BITS = 35
+ID_LENGTH = 20
+
+
+def encode_base32(value, length=ID_LENGTH):
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(CROCKFORD_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def normalize_complaint_id(complaint_id):
+    """
+    Canonical form of a typed-in ID: upper case, with the Crockford look-alikes
+    O, I and L read as 0 and 1. Legacy hex IDs contain none of those, so they
+    are unchanged.
+    """
+    return complaint_id.strip().upper().translate(_CROCKFORD_ALIASES)
+
+
+def random_id():
+    """The original scheme: 8 random hex characters."""
+    return str(uuid.uuid4()).split("-")[0].upper()
+
+
+class SortableIdGenerator:
+    """
+    Snowflake-style IDs: a millisecond timestamp, a node number and a
+    per-node sequence, so new IDs always sort after older ones and land at
+    the right edge of the primary-key index. Random low bits keep them from
+    being guessed.
+
+    Uniqueness across processes comes from the node number. Set
+    COMPLAINT_ID_NODE (0-8191) to a distinct value per process/host for a
+    guarantee; otherwise each process draws a random node, and two processes
+    sharing one would also need the same millisecond, sequence and random
+    bits to clash (callers still retry on a duplicate key).
+    If the sequence runs out, or the clock steps back, the generator moves
+    its own timestamp forward instead of waiting.
+    """
+
+    def __init__(self, node=None):
+        self._configured_node = node
+        self._lock = threading.Lock()
+        self._pid = None
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _node(self):
+        node = self._configured_node
+        if node is None:
+            node = os.getenv("COMPLAINT_ID_NODE")
+        if node in (None, ""):
+            # Process IDs repeat across hosts and containers (often PID 1)
+            node = random.SystemRandom().randrange(1 << NODE_BITS)
+            logger.warning("⚠️ COMPLAINT_ID_NODE not set; using random node %d. Set it per worker "
+                           "to guarantee unique complaint IDs.", node)
+        return int(node) % (1 << NODE_BITS)
+
+    def __call__(self):
+        with self._lock:
+            # A forked worker must not reuse its parent's node and sequence
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self.node = self._node()
+                self._last_ms, self._sequence = -1, 0
+
+            now_ms = int(time.time() * 1000) - ID_EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms, self._sequence = now_ms, 0
+            else:
+                self._sequence += 1
+                if self._sequence >> SEQUENCE_BITS:
+                    self._last_ms, self._sequence = self._last_ms + 1, 0
+
+            value = (
+                (self._last_ms << (NODE_BITS + SEQUENCE_BITS + RANDOM_BITS))
+                | (self.node << (SEQUENCE_BITS + RANDOM_BITS))
+                | (self._sequence << RANDOM_BITS)
+                | secrets.randbits(RANDOM_BITS)
+            )
+        return encode_base32(value)
+
+
+GENERATORS = {
+    "random": random_id,
+    "sortable": SortableIdGenerator(),
+}
+
+
+def load_generator(scheme=COMPLAINT_ID_SCHEME):
+    """Returns a built-in generator by name, or imports a "module:function" one."""
+    if scheme in GENERATORS:
+        return GENERATORS[scheme]
+    module_name, _, attr = scheme.partition(":")
+    if not attr:
+        raise ValueError(f"Unknown complaint ID scheme: {scheme}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+new_complaint_id = load_generator()
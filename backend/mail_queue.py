@@ -0,0 +1,155 @@
+import os
+import logging
+import threading
+
+from dotenv import load_dotenv
+
+from database.models import db
+from backend.storage import claim_due_emails, mark_email_sent, mark_email_failed
+from backend.email_templates import build_digest_email
+
+load_dotenv()
+logger = logging.getLogger("mail-queue")
+
+MAIL_QUEUE_WORKERS = int(os.getenv("MAIL_QUEUE_WORKERS", "2"))
+MAIL_QUEUE_BATCH_SIZE = int(os.getenv("MAIL_QUEUE_BATCH_SIZE", "20"))
+MAIL_QUEUE_POLL_SECONDS = float(os.getenv("MAIL_QUEUE_POLL_SECONDS", "5"))
+MAIL_QUEUE_LEASE_SECONDS = int(os.getenv("MAIL_QUEUE_LEASE_SECONDS", "300"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "6"))
+MAIL_RETRY_BASE_SECONDS = float(os.getenv("MAIL_RETRY_BASE_SECONDS", "30"))
+MAIL_RETRY_MAX_SECONDS = float(os.getenv("MAIL_RETRY_MAX_SECONDS", "3600"))
+
+# New complaint emails wait this long so several for the same department go
+# out as one digest. 0 sends each email on its own as soon as possible.
+MAIL_DIGEST_WINDOW_SECONDS = int(os.getenv("MAIL_DIGEST_WINDOW_SECONDS", "0"))
+
+# Set by notify() so workers pick up new mail without waiting for the next poll
+_wake = threading.Event()
+_workers = []
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base, ... capped at the maximum."""
+    return min(MAIL_RETRY_MAX_SECONDS, MAIL_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def notify():
+    """Wakes the delivery workers after new mail has been committed."""
+    _wake.set()
+
+
+def _record(email, delivered, error=None):
+    if delivered:
+        mark_email_sent(email)
+    elif email.attempts >= MAIL_MAX_ATTEMPTS:
+        logger.error("❌ Giving up on email %s to %s after %d attempts", email.email_id, email.to_email, email.attempts)
+        mark_email_failed(email, error)
+    else:
+        delay = retry_delay(email.attempts)
+        logger.warning("⚠️ Email %s to %s failed (%s); retrying in %.0fs", email.email_id, email.to_email, error, delay)
+        mark_email_failed(email, error, retry_in_seconds=delay)
+    return delivered
+
+
+def deliver(email, sender):
+    try:
+        delivered = sender.send_email(email.subject, email.body, email.to_email)
+        error = None if delivered else "SMTP send failed"
+    except Exception as e:
+        delivered, error = False, e
+    return _record(email, delivered, error)
+
+
+def group_messages(emails, digest=MAIL_DIGEST_WINDOW_SECONDS > 0):
+    """
+    Turns claimed emails into outgoing messages. With digests on, first
+    attempts to the same recipient are merged into one message; retries and
+    emails that are not digestible (escalations) are always sent as they are. Returns (subject, body, to_email, emails) tuples.
+    """
+    messages, pending = [], {}
+    for email in emails:
+        if digest and email.digestible and email.attempts == 1:
+            pending.setdefault(email.to_email, []).append(email)
+        else:
+            messages.append((email.subject, email.body, email.to_email, [email]))
+
+    for to_email, group in pending.items():
+        if len(group) == 1:
+            messages.append((group[0].subject, group[0].body, to_email, group))
+        else:
+            subject, body = build_digest_email([(email.subject, email.body) for email in group])
+            messages.append((subject, body, to_email, group))
+    return messages
+
+
+def drain_once(batch_size=MAIL_QUEUE_BATCH_SIZE):
+    """
+    Claims and delivers one batch of due emails over a single pooled SMTP
+    session. Returns how many were claimed.
+    """
+    from backend.email_sender import get_email_sender
+
+    digest = MAIL_DIGEST_WINDOW_SECONDS > 0
+    emails = claim_due_emails(batch_size, MAIL_QUEUE_LEASE_SECONDS, include_pending_for_recipients=digest)
+    if not emails:
+        return 0
+
+    messages = group_messages(emails, digest)
+    try:
+        results = get_email_sender().send_many([(subject, body, to) for subject, body, to, _ in messages])
+        error = "SMTP send failed"
+    except Exception as e:
+        results, error = [False] * len(messages), e
+
+    for (_, _, _, group), delivered in zip(messages, results):
+        for email in group:
+            _record(email, delivered, None if delivered else error)
+    return len(emails)
+
+
+def _run(app):
+    while True:
+        try:
+            with app.app_context():
+                claimed = drain_once()
+        except Exception as e:
+            logger.exception("Mail queue worker error: %s", e)
+            with app.app_context():
+                db.session.rollback()
+            claimed = 0
+
+        # A full batch means more mail may be due right away
+        if claimed < MAIL_QUEUE_BATCH_SIZE:
+            _wake.wait(MAIL_QUEUE_POLL_SECONDS)
+            _wake.clear()
+
+
+def start_workers(app, workers=MAIL_QUEUE_WORKERS):
+    """Starts the background delivery threads (once per process)."""
+    if _workers or workers <= 0:
+        return _workers
+    for i in range(workers):
+        thread = threading.Thread(target=_run, args=(app,), name=f"mail-queue-{i}", daemon=True)
+        thread.start()
+        _workers.append(thread)
+    logger.info("📬 Mail queue started with %d worker(s).", workers)
+    return _workers
+
+
+def main():
+    """
+    Standalone drainer for deployments that set MAIL_QUEUE_WORKERS=0 on the
+    web workers: python -m backend.mail_queue
+    """
+    os.environ["BACKGROUND_SERVICES"] = "false"
+    from main import app, create_database
+    # Run as a script this module is __main__; use the copy the app imported
+    from backend import mail_queue
+
+    create_database()
+    logger.info("📬 Draining the mail queue in the foreground (Ctrl+C to stop).")
+    mail_queue._run(app)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import os
+import time
+import threading
+import functools
+from bisect import bisect_left
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Off: spans and timed() functions run unwrapped and /metrics returns 404
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_PREFIX = "smart_complaint_box"
+
+# Upper bounds in seconds, from sub-millisecond cache hits to slow SMTP
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_perf_counter = time.perf_counter
+
+
+class Histogram:
+    """One labelled series: a count per bucket plus the sum of observations."""
+
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class HistogramFamily:
+    """A named histogram metric with one Histogram per label combination."""
+
+    def __init__(self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = f"{METRICS_PREFIX}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for values, child in sorted(self._children.items()):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values))
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REQUEST_LATENCY = HistogramFamily(
+    "http_request_duration_seconds", "Request latency by endpoint.", ("method", "endpoint", "status"),
+)
+SPAN_LATENCY = HistogramFamily(
+    "span_duration_seconds", "Time spent in instrumented operations.", ("span",),
+)
+
+
+class _Span:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = _perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(_perf_counter() - self.start)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name):
+    """Times a block: `with span("storage.commit"): ...`"""
+    if not METRICS_ENABLED:
+        return _NO_SPAN
+    return _Span(SPAN_LATENCY.labels(name))
+
+
+def timed(name):
+    """
+    Decorator recording each call's duration under span `name`. The series
+    is looked up once, at decoration time, so a call only pays for two
+    perf_counter() reads and one observe(). With metrics off, the function
+    is returned unwrapped.
+    """
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+        histogram = SPAN_LATENCY.labels(name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = _perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(_perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(family.render() for family in (REQUEST_LATENCY, SPAN_LATENCY)) + "\n"
+
+
+def install(app):
+    """
+    Registers request hooks that record each request's latency, labelled by
+    route endpoint rather than URL so IDs in paths don't create new series.
+    """
+    if not METRICS_ENABLED:
+        return False
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = _perf_counter()
+
+    @app.after_request
+    def _record_latency(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            REQUEST_LATENCY.labels(
+                request.method, request.endpoint or "unmatched", str(response.status_code)
+            ).observe(_perf_counter() - start)
+        return response
+
+    return True
@@ -0,0 +1,190 @@
+import os
+import sys
+import time
+import marshal
+import cProfile
+import logging
+import threading
+from collections import Counter
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger("profiler")
+
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+
+MODES = ("sample", "cprofile")
+# The endpoints that start and stop sessions are never profiled themselves
+CONTROL_ENDPOINTS = ("admin_bp.start_profiler", "admin_bp.stop_profiler")
+
+# The session started by the admin endpoint, if any (one per process)
+_session = None
+# Thread ident -> session, for requests being profiled right now. Empty
+# whenever nothing is being profiled, which is all the request hooks check.
+_in_flight = {}
+
+
+def _frame_name(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def collapse(frame):
+    """A stack as one collapsed-format line key: root;...;leaf."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class ProfileSession:
+    """
+    Profiles the requests it selects until its time or request budget runs
+    out. "sample" mode reads the stacks of the selected request threads every
+    interval, so other requests are never touched. "cprofile" mode traces one
+    selected request at a time with cProfile; requests arriving while one is
+    traced are not selected. On Python 3.12+ cProfile is built on
+    sys.monitoring, which is interpreter-wide, so while a request is traced
+    other threads' calls are recorded (and slowed) too.
+    """
+
+    def __init__(self, mode="sample", seconds=30, requests=None, endpoint=None,
+                 interval_ms=PROFILE_SAMPLE_INTERVAL_MS):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.mode = mode
+        self.seconds = min(float(seconds), PROFILE_MAX_SECONDS)
+        self.deadline = time.monotonic() + self.seconds
+        self.remaining = requests
+        self.endpoint = endpoint
+        self.interval = interval_ms / 1000
+
+        self.requests = 0
+        self.samples = 0
+        self.stacks = Counter()
+        self.threads = set()
+        self.profile = cProfile.Profile() if mode == "cprofile" else None
+        self._tracing = threading.Lock()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+        if mode == "sample":
+            threading.Thread(target=self._sample, name="profiler-sampler", daemon=True).start()
+
+    @property
+    def done(self):
+        if not self._done.is_set() and time.monotonic() >= self.deadline:
+            self._done.set()
+        return self._done.is_set()
+
+    def finish(self, timeout=5.0):
+        """
+        Ends the session. In cprofile mode, first waits up to `timeout`
+        seconds for a request still being traced, so the stats are read
+        from a profiler nobody is writing to.
+        """
+        self._done.set()
+        if self._tracing.acquire(timeout=timeout):
+            self._tracing.release()
+        else:
+            logger.warning("🔬 A traced request is still running; its partial stats are included.")
+
+    def begin(self, endpoint):
+        """Called at the start of a request; True if this request is profiled."""
+        if endpoint in CONTROL_ENDPOINTS or self.done or (self.endpoint and endpoint != self.endpoint):
+            return False
+        with self._lock:
+            if self.remaining is not None and self.requests >= self.remaining:
+                return False
+            if self.profile is not None:
+                if not self._tracing.acquire(blocking=False):
+                    return False
+                if self._done.is_set():  # finish() ran since the check above
+                    self._tracing.release()
+                    return False
+                self.profile.enable()
+            self.requests += 1
+            self.threads.add(threading.get_ident())
+        return True
+
+    def end(self):
+        """Called when a profiled request finishes, on the same thread."""
+        if self.profile is not None:
+            self.profile.disable()
+            self._tracing.release()
+        with self._lock:
+            self.threads.discard(threading.get_ident())
+            if self.remaining is not None and self.requests >= self.remaining and not self.threads:
+                self._done.set()
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            if self.done:
+                break
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[collapse(frame)] += 1
+                    self.samples += 1
+
+    def collapsed(self):
+        """Collapsed stacks ("a;b;c count" per line), as flamegraph.pl and speedscope read them."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def pstats(self):
+        """The cProfile stats marshalled like Profile.dump_stats() writes them."""
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+    def summary(self):
+        return {
+            "mode": self.mode,
+            "pid": os.getpid(),
+            "requests": self.requests,
+            "samples": self.samples,
+            "done": self.done,
+        }
+
+
+def start_session(**options):
+    """Starts profiling in this worker. Raises RuntimeError if a session is running."""
+    global _session
+    if _session is not None and not _session.done:
+        raise RuntimeError("A profiling session is already running in this worker")
+    _session = ProfileSession(**options)
+    logger.info("🔬 Profiling started (%s, up to %.0fs).", _session.mode, _session.seconds)
+    return _session
+
+
+def stop_session():
+    """Ends the current session and hands it over, or returns None if there is none."""
+    global _session
+    session, _session = _session, None
+    if session is not None:
+        session.finish()
+        logger.info("🔬 Profiling stopped: %d request(s) profiled.", session.requests)
+    return session
+
+
+def install(app):
+    """
+    Registers the request hooks. With no session running they do one
+    global read (before) and one empty-dict check (teardown) per request.
+    """
+    from flask import request
+
+    @app.before_request
+    def _begin_profile():
+        session = _session
+        if session is not None and session.begin(request.endpoint):
+            _in_flight[threading.get_ident()] = session
+
+    @app.teardown_request
+    def _end_profile(exc=None):
+        if _in_flight:
+            session = _in_flight.pop(threading.get_ident(), None)
+            if session is not None:
+                session.end()
@@ -1,7 +1,16 @@
+import os
 import json
+import time
 import logging
+from collections import namedtuple
+
+from flask import has_app_context
+from dotenv import load_dotenv
+
 from paths import ROUTING_CONFIG_PATH
+from backend import storage
 
+load_dotenv()
 logger = logging.getLogger("router")
 
 ETA_MAPPING = {
@@ -11,6 +20,25 @@ ETA_MAPPING = {
     "default": "within 7 business days"
 }
 
+# "database" routes from the departments table (seeded from routing.json
+# when empty); "file" routes from routing.json alone
+ROUTING_SOURCE = os.getenv("ROUTING_SOURCE", "database").lower()
+# How often lookups check the departments version or the routing.json mtime
+# for changes (0 = reload only via /reload_routing)
+ROUTING_WATCH_SECONDS = float(os.getenv("ROUTING_WATCH_SECONDS", "5"))
+
+LEVELS = ("level1", "level2", "level3")
+FALLBACK_ROUTE = ("general.inquiries@example.com", "general.escalation@example.com", "general.escalation@example.com")
+
+# Department emails for one (category, subcategory); never relayed
+Route = namedtuple("Route", LEVELS)
+
+# A compiled routing config: every (category, subcategory) in it, each
+# category's default, and the global default, all with fallbacks resolved.
+# `stamp` is the routing.json mtime or departments version it was built from.
+CompiledRouting = namedtuple("CompiledRouting", ["routes", "categories", "default", "stamp"])
+
+
 def load_routing_config():
     if ROUTING_CONFIG_PATH.exists():
         try:
@@ -20,21 +48,180 @@ def load_routing_config():
             logger.error("Failed to load routing config: %s", e)
     return {}
 
-ROUTING = load_routing_config()
+
+def _resolve(entry, fallback):
+    if not isinstance(entry, dict):
+        raise ValueError(f"Routing entry must be an object, got {entry!r}")
+    route = []
+    for level, default in zip(LEVELS, fallback):
+        email = entry.get(level) or default
+        if "@" not in email:
+            raise ValueError(f"Invalid {level} email: {email!r}")
+        route.append(email)
+    return Route(*route)
+
+
+def config_rows(config):
+    """routing.json entries as departments rows, fallbacks left unresolved."""
+    return [
+        {"category": category, "subcategory": subcategory,
+         **{f"{level}_email": entry.get(level) for level in LEVELS}}
+        for category, subcategories in config.items()
+        for subcategory, entry in subcategories.items()
+    ]
+
+
+def departments_config(departments):
+    """The routing.json-shaped config for a list of departments rows."""
+    config = {}
+    for department in departments:
+        config.setdefault(department.category, {})[department.subcategory] = {
+            level: getattr(department, f"{level}_email") for level in LEVELS
+        }
+    return config
+
+
+def compile_routing(config, stamp=None):
+    """
+    Flattens the nested routing config. A missing level falls back to the
+    category's "default" entry, then to the global "default" category, then
+    to FALLBACK_ROUTE, so lookups never have to walk the chain. Raises
+    ValueError on a malformed config.
+    """
+    if not isinstance(config, dict):
+        raise ValueError("Routing config must be an object")
+
+    default = _resolve(config.get("default", {}).get("default", {}), FALLBACK_ROUTE)
+    routes, categories = {}, {}
+    for category, subcategories in config.items():
+        if category == "default":
+            continue
+        if not isinstance(subcategories, dict):
+            raise ValueError(f"Routing for {category!r} must be an object")
+        categories[category] = category_default = _resolve(subcategories.get("default", {}), default)
+        for subcategory, entry in subcategories.items():
+            if subcategory != "default":
+                routes[(category, subcategory)] = _resolve(entry, category_default)
+    return CompiledRouting(routes, categories, default, stamp)
+
+
+def _config_mtime():
+    try:
+        return ROUTING_CONFIG_PATH.stat().st_mtime
+    except OSError:
+        return None
+
+
+# Until the departments table is first read, route from routing.json
+_compiled = compile_routing(load_routing_config(), _config_mtime() if ROUTING_SOURCE == "file" else None)
+_next_check = 0.0
+
+
+def _compile_source():
+    if ROUTING_SOURCE == "database":
+        # Version first: a change landing in between only causes one extra reload
+        version = storage.get_routing_version()
+        departments = storage.list_departments()
+        return compile_routing(departments_config(departments) if departments else load_routing_config(), version)
+
+    mtime = _config_mtime()
+    try:
+        with open(ROUTING_CONFIG_PATH, "r", encoding="utf-8") as f:
+            return compile_routing(json.load(f), mtime)
+    except (OSError, ValueError):
+        # Don't retry a bad file on every check; wait for it to change again
+        global _compiled
+        _compiled = _compiled._replace(stamp=mtime)
+        raise
+
+
+def reload_routing():
+    """
+    Recompiles the routing source and swaps it in with one assignment, so
+    lookups see either the old table or the new one. A broken source keeps
+    the current table and raises ValueError. The database source needs an
+    app context.
+    """
+    global _compiled
+    try:
+        compiled = _compile_source()
+    except (OSError, ValueError) as e:
+        logger.error("❌ Routing reload failed, keeping the current table: %s", e)
+        raise ValueError(f"Routing reload failed: {e}") from e
+
+    _compiled = compiled
+    logger.info("🔄 Routing reloaded from %s: %d routes.", ROUTING_SOURCE, len(compiled.routes))
+    return compiled
+
+
+def _is_stale():
+    if ROUTING_SOURCE == "database":
+        return has_app_context() and storage.get_routing_version() != _compiled.stamp
+    return _config_mtime() != _compiled.stamp
+
+
+def _current():
+    """
+    The compiled table. At most once every ROUTING_WATCH_SECONDS a lookup
+    also checks the source's version (one primary-key read, or one stat of
+    routing.json) and reloads if it moved.
+    """
+    global _next_check
+    if ROUTING_WATCH_SECONDS > 0 and time.monotonic() >= _next_check:
+        _next_check = time.monotonic() + ROUTING_WATCH_SECONDS
+        try:
+            if _is_stale():
+                reload_routing()
+        except Exception as e:
+            logger.warning("⚠️ Routing check failed, keeping the current table: %s", e)
+    return _compiled
+
+
+def get_route(category: str, subcategory: str) -> Route:
+    """All three department emails for a complaint, in one lookup."""
+    compiled = _current()
+    route = compiled.routes.get((category, subcategory))
+    if route is None:
+        route = compiled.categories.get(category, compiled.default)
+    return route
+
 
 def get_level1_department(category: str, subcategory: str) -> str:
     """Return real department email (never relayed)."""
-    return ROUTING.get(category, {}).get(subcategory, {}).get(
-        "level1",
-        ROUTING.get(category, {}).get("default", {}).get("level1", "general.inquiries@example.com")
-    )
+    return get_route(category, subcategory).level1
 
 def get_level2_department(category: str, subcategory: str) -> str:
     """Return real escalation email (never relayed)."""
-    return ROUTING.get(category, {}).get(subcategory, {}).get(
-        "level2",
-        ROUTING.get(category, {}).get("default", {}).get("level2", "general.escalation@example.com")
-    )
+    return get_route(category, subcategory).level2
+
+def get_level3_department(category: str, subcategory: str) -> str:
+    """Return final escalation email (never relayed)."""
+    return get_route(category, subcategory).level3
+
+
+def check_departments(departments):
+    """
+    Compares the routing table with rows from the departments table and
+    returns a list of human-readable differences (empty when they agree).
+    Only meaningful for the "file" source; with "database" the departments
+    table is the routing.
+    """
+    if ROUTING_SOURCE != "file":
+        return []
+    compiled = _current()
+    problems = []
+    for department in departments:
+        key = (department.category, department.subcategory)
+        route = compiled.routes.get(key)
+        if route is None:
+            problems.append(f"{key[0]}/{key[1]} is in departments but not in routing.json")
+            continue
+        for level, routed in zip(LEVELS, route):
+            stored = getattr(department, f"{level}_email")
+            if stored and stored != routed:
+                problems.append(f"{key[0]}/{key[1]} {level}: routing.json has {routed}, departments has {stored}")
+    return problems
+
 
 def get_eta_message(urgency: str) -> str:
-    return ETA_MAPPING.get(urgency, ETA_MAPPING["default"])
\ No newline at end of file
+    return ETA_MAPPING.get(urgency, ETA_MAPPING["default"])
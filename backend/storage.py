@@ -1,5 +1,19 @@
-from database.models import db, Complaint, StatusLog
-from datetime import datetime
+from database.models import db, Complaint, StatusLog, OutboundEmail, ComplaintStat, Department, RoutingVersion
+from sqlalchemy import select, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from backend.cache import TTLCache
+from backend import ids
+from backend.ids import normalize_complaint_id
+from backend.metrics import timed
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+import os
+import json
+import uuid
+import base64
+import binascii
 import pytz
 
 utc = pytz.utc
@@ -10,7 +24,14 @@ def now_utc():
     return datetime.now(utc)
 
 
-def save_complaint(complaint_id, user_input, category, subcategory, urgency, assigned_to):
+@timed("storage.save_complaint")
+def save_complaint(complaint_id, user_input, category, subcategory, urgency, assigned_to,
+                   notifications=(), notification_delay=0):
+    """
+    Saves a complaint with its first status log. `notifications` is a list of
+    (to_email, subject, body) tuples queued in the same transaction, so an
+    email is only ever sent for a complaint that was actually stored.
+    """
     current_time_utc = now_utc()
 
     new_complaint = Complaint(
@@ -34,23 +55,246 @@ def save_complaint(complaint_id, user_input, category, subcategory, urgency, ass
     )
     db.session.add(new_log)
 
+    for to_email, subject, body in notifications:
+        enqueue_email(
+            to_email, subject, body,
+            complaint_id=complaint_id, queued_at=current_time_utc, delay_seconds=notification_delay,
+        )
+
+    bump_stats(Counter(stat_keys(new_complaint, with_day=True)))
     db.session.commit()
     return new_complaint
 
 
+def new_complaint_id():
+    """A new ID from the configured COMPLAINT_ID_SCHEME (see backend.ids)."""
+    return ids.new_complaint_id()
+
+
+def is_complaint_id_collision(error):
+    """True if an IntegrityError is a duplicate complaints primary key."""
+    message = str(getattr(error, "orig", error)).lower()
+    if "unique" not in message and "duplicate" not in message:
+        return False
+    return any(name in message for name in ("complaints.complaint_id", "complaints_pkey", "primary"))
+
+
+@timed("storage.bulk_save_complaints")
+def bulk_save_complaints(complaints, notifications=(), notification_delay=0):
+    """
+    Inserts many complaints with their first status logs and queued
+    notifications in one transaction, using executemany inserts rather than
+    ORM objects.
+
+    `complaints` holds dicts with complaint_id, user_input, category,
+    subcategory, urgency and assigned_to; `notifications` holds
+    (complaint_id, to_email, subject, body) tuples. Returns the timestamp
+    stored as created_at.
+    """
+    current_time_utc = now_utc()
+    next_attempt_at = current_time_utc + timedelta(seconds=notification_delay)
+
+    complaint_rows = [
+        {**c, "status": "Pending", "created_at": current_time_utc, "updated_at": current_time_utc}
+        for c in complaints
+    ]
+    log_rows = [
+        {"complaint_id": c["complaint_id"], "status": "Pending", "assigned_to": c["assigned_to"],
+         "timestamp": current_time_utc}
+        for c in complaints
+    ]
+    email_rows = [
+        {"complaint_id": complaint_id, "to_email": to_email, "subject": subject, "body": body,
+         "status": "queued", "attempts": 0, "next_attempt_at": next_attempt_at, "created_at": current_time_utc}
+        for complaint_id, to_email, subject, body in notifications
+    ]
+
+    stats = Counter()
+    for row in complaint_rows:
+        stats.update(stat_keys(StatRow(**row), with_day=True))
+
+    try:
+        db.session.execute(Complaint.__table__.insert(), complaint_rows)
+        db.session.execute(StatusLog.__table__.insert(), log_rows)
+        if email_rows:
+            db.session.execute(OutboundEmail.__table__.insert(), email_rows)
+        bump_stats(stats)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return current_time_utc
+
+
 def get_complaint(complaint_id):
-    return Complaint.query.filter_by(complaint_id=complaint_id.upper()).first()
+    """Full ORM instance, for code paths that modify or delete the complaint."""
+    return Complaint.query.filter_by(complaint_id=normalize_complaint_id(complaint_id)).first()
+
+
+# ---------------- Read Paths ---------------- #
 
+# Display-only endpoints select just the columns they show and get SQLAlchemy
+# Row objects back (named-tuple rows: attribute access, no identity map, no
+# change tracking). Statements are built once; SQLAlchemy caches their SQL.
 
-def list_complaints():
-    return Complaint.query.all()
+complaints_table = Complaint.__table__
+status_log_table = StatusLog.__table__
 
+StatusLogRow = namedtuple("StatusLogRow", ["status", "assigned_to", "timestamp"])
+
+# Everything /get_status shows about the complaint itself
+STATUS_COLUMNS = (
+    "complaint_id", "user_input", "status", "category", "subcategory",
+    "urgency", "assigned_to", "created_at", "escalation_level",
+)
+
+_complaint_by_id = (
+    select(*(complaints_table.c[name] for name in STATUS_COLUMNS))
+    .where(complaints_table.c.complaint_id == bindparam("complaint_id"))
+)
+
+# The complaint and its status history in one round trip; a complaint with
+# no log rows still comes back once, with NULL log columns
+_complaint_with_logs = (
+    select(
+        *(complaints_table.c[name] for name in STATUS_COLUMNS),
+        status_log_table.c.status.label("log_status"),
+        status_log_table.c.assigned_to.label("log_assigned_to"),
+        status_log_table.c.timestamp.label("log_timestamp"),
+    )
+    .select_from(complaints_table.outerjoin(
+        status_log_table, status_log_table.c.complaint_id == complaints_table.c.complaint_id
+    ))
+    .where(complaints_table.c.complaint_id == bindparam("complaint_id"))
+    .order_by(status_log_table.c.timestamp)
+)
+
+# Serialized /get_status payloads. Every write path below drops the entry;
+# the TTL bounds staleness across worker processes, which do not share it.
+status_cache = TTLCache(
+    int(os.getenv("STATUS_CACHE_SIZE", "10000")),
+    float(os.getenv("STATUS_CACHE_TTL", "60")),
+)
+
+
+def invalidate_status(complaint_id):
+    status_cache.delete(normalize_complaint_id(complaint_id))
+
+
+def read_complaint(complaint_id):
+    """STATUS_COLUMNS of one complaint as a read-only row, or None."""
+    return db.session.execute(_complaint_by_id, {"complaint_id": normalize_complaint_id(complaint_id)}).first()
+
+
+@timed("storage.read_complaint_with_logs")
+def read_complaint_with_logs(complaint_id):
+    """
+    Returns (complaint, logs) from a single joined query: the STATUS_COLUMNS
+    row and its (status, assigned_to, timestamp) log rows, oldest first.
+    Returns (None, []) for an unknown complaint.
+    """
+    rows = db.session.execute(_complaint_with_logs, {"complaint_id": normalize_complaint_id(complaint_id)}).all()
+    if not rows:
+        return None, []
+    logs = [
+        StatusLogRow(row.log_status, row.log_assigned_to, row.log_timestamp)
+        for row in rows if row.log_status is not None
+    ]
+    return rows[0], logs
+
+
+# ---------------- Paginated Listing ---------------- #
+
+# Columns that can be filtered on; each has a (column, created_at, complaint_id) index
+COMPLAINT_FILTERS = ("status", "category", "urgency", "assigned_to")
+
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+LIST_PAGE_SIZE_MAX = int(os.getenv("LIST_PAGE_SIZE_MAX", "500"))
+
+
+def encode_cursor(complaint):
+    """Opaque cursor naming the position just after `complaint`."""
+    raw = json.dumps([complaint.created_at.isoformat(), complaint.complaint_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Returns (created_at, complaint_id); raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, complaint_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(complaint_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _select_complaints(columns, filters):
+    for name in filters:
+        if name not in COMPLAINT_FILTERS:
+            raise ValueError(f"Unknown filter: {name}")
+    return select(*(complaints_table.c[name] for name in columns)).where(
+        *(complaints_table.c[name] == value for name, value in filters.items())
+    )
 
+
+@timed("storage.page_complaints")
+def page_complaints(columns, limit=LIST_PAGE_SIZE, cursor=None, **filters):
+    """
+    Returns one page of complaints, newest first, as read-only rows of
+    `columns`, and the cursor for the next page (None on the last page).
+
+    Pages are keyed on (created_at, complaint_id) rather than OFFSET, so
+    each page is an index range scan and costs the same however deep it is.
+    `filters` are equality matches on COMPLAINT_FILTERS columns.
+    """
+    try:
+        limit = max(1, min(int(limit), LIST_PAGE_SIZE_MAX))
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+
+    # The cursor is built from these, so they are always selected
+    columns = list(dict.fromkeys([*columns, "created_at", "complaint_id"]))
+    query = _select_complaints(columns, filters)
+    created_col, id_col = complaints_table.c.created_at, complaints_table.c.complaint_id
+
+    if cursor:
+        created_at, complaint_id = decode_cursor(cursor)
+        # The plain `created_at <=` bound lets the planner range-scan the index
+        query = query.where(
+            created_col <= created_at,
+            db.or_(created_col < created_at, id_col < complaint_id),
+        )
+
+    rows = db.session.execute(
+        query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)
+    ).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def iter_complaint_rows(columns, batch_size=1000, **filters):
+    """
+    Yields plain row tuples of the named Complaint `columns`, oldest first,
+    through a server-side cursor that holds `batch_size` rows at a time.
+    Nothing is loaded into the ORM identity map, so memory stays flat
+    however large the table is.
+    """
+    query = _select_complaints(columns, filters).order_by(
+        complaints_table.c.created_at, complaints_table.c.complaint_id
+    )
+    result = db.session.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+    for row in result:
+        yield tuple(row)
+
+
+@timed("storage.update_status")
 def update_status(complaint_id, new_status, assigned_to=None):
     complaint = get_complaint(complaint_id)
     if not complaint:
         return None
 
+    before = stat_keys(complaint)
+
     complaint.status = new_status
     if assigned_to:
         complaint.assigned_to = assigned_to
@@ -59,30 +303,26 @@ def update_status(complaint_id, new_status, assigned_to=None):
     complaint.updated_at = current_time_utc
 
     new_log = StatusLog(
-        complaint_id=complaint_id,
+        complaint_id=complaint.complaint_id,
         status=new_status,
         assigned_to=assigned_to or complaint.assigned_to,
         timestamp=current_time_utc,
     )
     db.session.add(new_log)
+    bump_stats(stat_changes(before, stat_keys(complaint)))
     db.session.commit()
+    invalidate_status(complaint_id)
     return complaint
 
 
-def get_status_logs(complaint_id):
-    return (
-        StatusLog.query.filter_by(complaint_id=complaint_id.upper())
-        .order_by(StatusLog.timestamp)
-        .all()
-    )
-
-
+@timed("storage.update_complaint")
 def update_complaint(complaint_id, data):
     complaint = get_complaint(complaint_id)
     if not complaint:
         return None
 
     original_status = complaint.status
+    before = stat_keys(complaint)
     if "status" in data:
         complaint.status = data["status"]
     if "category" in data:
@@ -99,12 +339,435 @@ def update_complaint(complaint_id, data):
 
     if "status" in data and data["status"] != original_status:
         new_log = StatusLog(
-            complaint_id=complaint_id,
+            complaint_id=complaint.complaint_id,
             status=data["status"],
             assigned_to=complaint.assigned_to,
             timestamp=current_time_utc,
         )
         db.session.add(new_log)
 
+    bump_stats(stat_changes(before, stat_keys(complaint)))
+    db.session.commit()
+    invalidate_status(complaint_id)
+    return complaint
+
+
+@timed("storage.delete_complaint")
+def delete_complaint(complaint_id):
+    """
+    Deletes a complaint, its status log and its notifications still waiting
+    in the queue. Returns False if it does not exist.
+    """
+    complaint = get_complaint(complaint_id)
+    if not complaint:
+        return False
+
+    db.session.delete(complaint)
+    db.session.execute(
+        OutboundEmail.__table__.delete().where(
+            OutboundEmail.complaint_id == complaint.complaint_id, OutboundEmail.status == "queued",
+        )
+    )
+    bump_stats(stat_changes(stat_keys(complaint, with_day=True), []))
+    db.session.commit()
+    invalidate_status(complaint_id)
+    return True
+
+
+# ---------------- Departments ---------------- #
+
+DEPARTMENT_LEVELS = ("level1_email", "level2_email", "level3_email")
+
+
+def get_routing_version():
+    """Current departments version; a single primary-key read."""
+    return db.session.execute(
+        select(RoutingVersion.version).where(RoutingVersion.id == 1)
+    ).scalar() or 0
+
+
+def _bump_routing_version():
+    """Increments the departments version in the caller's transaction."""
+    table = RoutingVersion.__table__
+    updated = db.session.execute(
+        table.update().where(table.c.id == 1).values(version=table.c.version + 1)
+    )
+    if not updated.rowcount:
+        db.session.execute(table.insert(), {"id": 1, "version": 1})
+
+
+def list_departments():
+    return Department.query.order_by(Department.category, Department.subcategory).all()
+
+
+@timed("storage.save_department")
+def save_department(category, subcategory, levels):
+    """
+    Creates or updates the department for (category, subcategory) and bumps
+    the routing version. `levels` maps level1_email..level3_email to an email
+    or None. Returns the department.
+    """
+    department = Department.query.filter_by(category=category, subcategory=subcategory).first()
+    if department is None:
+        department = Department(category=category, subcategory=subcategory)
+        db.session.add(department)
+    for column in DEPARTMENT_LEVELS:
+        if column in levels:
+            setattr(department, column, levels[column])
+    _bump_routing_version()
+    db.session.commit()
+    return department
+
+
+def delete_department(dept_id):
+    """Deletes a department and bumps the routing version. Returns False if it does not exist."""
+    department = db.session.get(Department, dept_id)
+    if not department:
+        return False
+    db.session.delete(department)
+    _bump_routing_version()
+    db.session.commit()
+    return True
+
+
+def seed_departments(rows):
+    """
+    Fills an empty departments table from `rows` (dicts with category,
+    subcategory and the level emails). Returns how many were inserted, or
+    None if the table already has rows.
+    """
+    if db.session.execute(select(Department.dept_id).limit(1)).first():
+        return None
+    try:
+        if rows:
+            db.session.execute(Department.__table__.insert(), rows)
+        _bump_routing_version()
+        db.session.commit()
+    except IntegrityError:
+        # Another worker seeded it at the same time
+        db.session.rollback()
+        return None
+    return len(rows)
+
+
+# ---------------- SLA Escalation ---------------- #
+
+ESCALATION_COLUMNS = (
+    "complaint_id", "user_input", "category", "subcategory", "urgency",
+    "status", "assigned_to", "created_at", "escalation_level",
+)
+
+
+@timed("storage.find_overdue")
+def find_overdue(status, urgency, level, cutoff, limit):
+    """
+    Complaints with this status, urgency and escalation level submitted
+    before `cutoff`, oldest first. Equality on the first three columns and a
+    range on created_at is one ix_complaints_escalation range scan, so the
+    cost follows the number of rows returned, not the table size.
+    """
+    return db.session.execute(
+        select(*(complaints_table.c[name] for name in ESCALATION_COLUMNS))
+        .where(
+            complaints_table.c.status == status,
+            complaints_table.c.urgency == urgency,
+            complaints_table.c.escalation_level == level,
+            complaints_table.c.created_at <= cutoff,
+        )
+        .order_by(complaints_table.c.created_at)
+        .limit(limit)
+    ).all()
+
+
+@timed("storage.escalate_complaints")
+def escalate_complaints(escalations):
+    """
+    Applies a batch of escalations in one transaction. `escalations` holds
+    (row, new_level, new_assignee, (to_email, subject, body)) tuples, with
+    rows from find_overdue().
+
+    Each complaint moves with a compare-and-set on its status and level, so
+    one that was resolved or escalated elsewhere in the meantime is skipped.
+    Status logs and notifications for the batch go in with executemany
+    inserts. Returns the IDs that were escalated.
+    """
+    current_time_utc = now_utc()
+    escalated, log_rows, email_rows, stats = [], [], [], Counter()
+
+    for row, level, assignee, (to_email, subject, body) in escalations:
+        updated = db.session.execute(
+            complaints_table.update()
+            .where(
+                complaints_table.c.complaint_id == row.complaint_id,
+                complaints_table.c.status == row.status,
+                complaints_table.c.escalation_level == row.escalation_level,
+            )
+            .values(escalation_level=level, assigned_to=assignee, updated_at=current_time_utc)
+        )
+        if not updated.rowcount:
+            continue
+
+        escalated.append(row.complaint_id)
+        log_rows.append({
+            "complaint_id": row.complaint_id, "status": f"Escalated L{level}",
+            "assigned_to": assignee, "timestamp": current_time_utc,
+        })
+        email_rows.append({
+            "complaint_id": row.complaint_id, "to_email": to_email, "subject": subject, "body": body,
+            "status": "queued", "attempts": 0, "digestible": False,
+            "next_attempt_at": current_time_utc, "created_at": current_time_utc,
+        })
+        stats.update(stat_changes([("department", row.assigned_to or NO_VALUE)], [("department", assignee)]))
+
+    if escalated:
+        db.session.execute(StatusLog.__table__.insert(), log_rows)
+        db.session.execute(OutboundEmail.__table__.insert(), email_rows)
+        bump_stats(stats)
+    db.session.commit()
+
+    for complaint_id in escalated:
+        invalidate_status(complaint_id)
+    return escalated
+
+
+# ---------------- Dashboard Statistics ---------------- #
+
+# complaint_stats holds one running count per (dimension, value), kept up to
+# date in the same transaction as every complaint write. Dimensions are the
+# complaint columns below plus "day" (the IST submission date).
+STAT_DIMENSIONS = {
+    "status": "status",
+    "category": "category",
+    "urgency": "urgency",
+    "department": "assigned_to",
+}
+NO_VALUE = "(none)"
+
+# Attribute-only stand-in for a complaint, used for rows inserted in bulk
+StatRow = namedtuple(
+    "StatRow", [c.name for c in Complaint.__table__.columns], defaults=[None] * len(Complaint.__table__.columns)
+)
+
+
+def _day_key(created_at):
+    if created_at.tzinfo is None:
+        created_at = utc.localize(created_at)
+    return created_at.astimezone(ist).date().isoformat()
+
+
+def stat_keys(complaint, with_day=False):
+    """The (dimension, value) counters a complaint contributes to."""
+    keys = [
+        (dimension, getattr(complaint, column) or NO_VALUE)
+        for dimension, column in STAT_DIMENSIONS.items()
+    ]
+    if with_day:
+        keys.append(("day", _day_key(complaint.created_at)))
+    return keys
+
+
+def stat_changes(before, after):
+    """Counter deltas that turn the `before` keys into the `after` keys."""
+    changes = Counter(after)
+    changes.subtract(before)
+    return changes
+
+
+def bump_stats(changes):
+    """
+    Adds `changes` ({(dimension, value): delta}) to complaint_stats with one
+    upsert statement. Runs in the caller's transaction; the caller commits.
+    """
+    rows = [
+        {"dimension": dimension, "value": value, "count": delta}
+        for (dimension, value), delta in changes.items() if delta
+    ]
+    if not rows:
+        return
+
+    table = ComplaintStat.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["dimension", "value"], set_={"count": table.c.count + stmt.excluded.count}
+        )
+    elif dialect == "mysql":
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted["count"])
+    else:
+        for row in rows:
+            updated = db.session.execute(
+                table.update()
+                .where(table.c.dimension == row["dimension"], table.c.value == row["value"])
+                .values(count=table.c.count + row["count"])
+            )
+            if not updated.rowcount:
+                db.session.execute(table.insert(), row)
+        return
+    db.session.execute(stmt, rows)
+
+
+def rebuild_stats():
+    """
+    Recomputes complaint_stats from the complaints table with one pass over
+    it. Only needed for databases that predate the stats table or were
+    loaded behind the application's back.
+    """
+    columns = [complaints_table.c[column] for column in STAT_DIMENSIONS.values()]
+    counts = Counter()
+    result = db.session.execute(
+        select(*columns, complaints_table.c.created_at).execution_options(stream_results=True, yield_per=10000)
+    )
+    for row in result:
+        counts.update(stat_keys(row, with_day=True))
+
+    db.session.execute(ComplaintStat.__table__.delete())
+    bump_stats(counts)
+    db.session.commit()
+    return sum(n for (dimension, _), n in counts.items() if dimension == "status")
+
+
+def ensure_stats():
+    """Builds complaint_stats once if it is empty but complaints exist."""
+    if ComplaintStat.query.first() is None and Complaint.query.first() is not None:
+        return rebuild_stats()
+    return None
+
+
+@timed("storage.get_stats")
+def get_stats(days=30):
+    """
+    Dashboard numbers straight from complaint_stats: totals per dimension
+    and submissions per day for the last `days` days. The cost depends on
+    the number of distinct values, not on the number of complaints.
+    """
+    table = ComplaintStat.__table__
+    stats = {f"by_{dimension}": {} for dimension in STAT_DIMENSIONS}
+    rows = db.session.execute(
+        select(table.c.dimension, table.c.value, table.c.count)
+        .where(table.c.dimension.in_(list(STAT_DIMENSIONS)), table.c.count != 0)
+    )
+    for dimension, value, count in rows:
+        stats[f"by_{dimension}"][value] = count
+
+    first_day = (now_utc().astimezone(ist).date() - timedelta(days=days - 1)).isoformat()
+    stats["daily"] = [
+        {"date": value, "submitted": count}
+        for value, count in db.session.execute(
+            select(table.c.value, table.c.count)
+            .where(table.c.dimension == "day", table.c.value >= first_day)
+            .order_by(table.c.value)
+        )
+    ]
+    stats["total"] = sum(stats["by_status"].values())
+    return stats
+
+
+# ---------------- Outbound Email Queue ---------------- #
+
+@timed("storage.enqueue_email")
+def enqueue_email(to_email, subject, body, complaint_id=None, queued_at=None, delay_seconds=0):
+    """
+    Adds an email to the outbound queue, due after `delay_seconds`.
+    The caller commits.
+    """
+    queued_at = queued_at or now_utc()
+    email = OutboundEmail(
+        complaint_id=complaint_id,
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        status="queued",
+        attempts=0,
+        next_attempt_at=queued_at + timedelta(seconds=delay_seconds),
+        created_at=queued_at,
+    )
+    db.session.add(email)
+    return email
+
+
+@timed("storage.claim_due_emails")
+def claim_due_emails(limit, lease_seconds, include_pending_for_recipients=False):
+    """
+    Claims up to `limit` due emails for this worker and returns them.
+    With `include_pending_for_recipients`, queued emails to the same
+    addresses are claimed too, even if they are not due yet.
+
+    Claimed rows move to "sending" with a lease: if the worker dies before
+    reporting back, they become due again once the lease expires. The claim
+    token makes the claim safe when several processes drain the same table.
+    """
+    current_time_utc = now_utc()
+    due_ids = [
+        email_id
+        for (email_id,) in db.session.query(OutboundEmail.email_id)
+        .filter(OutboundEmail.status.in_(["queued", "sending"]))
+        .filter(OutboundEmail.next_attempt_at <= current_time_utc)
+        .order_by(OutboundEmail.next_attempt_at)
+        .limit(limit)
+    ]
+    if not due_ids:
+        return []
+
+    claimable = db.or_(
+        db.and_(
+            OutboundEmail.status.in_(["queued", "sending"]),
+            OutboundEmail.next_attempt_at <= current_time_utc,
+        ),
+        OutboundEmail.status == "queued" if include_pending_for_recipients else db.false(),
+    )
+
+    if include_pending_for_recipients:
+        # Pull in not-yet-due first attempts to the same recipients, so they
+        # can go out together in one digest
+        recipients = [
+            to_email
+            for (to_email,) in db.session.query(OutboundEmail.to_email)
+            .filter(OutboundEmail.email_id.in_(due_ids))
+            .distinct()
+        ]
+        due_ids += [
+            email_id
+            for (email_id,) in db.session.query(OutboundEmail.email_id)
+            .filter(OutboundEmail.to_email.in_(recipients))
+            .filter(OutboundEmail.status == "queued", OutboundEmail.attempts == 0)
+            .filter(OutboundEmail.digestible.is_(True))
+            .filter(OutboundEmail.email_id.notin_(due_ids))
+        ]
+
+    token = uuid.uuid4().hex
+    db.session.query(OutboundEmail).filter(
+        OutboundEmail.email_id.in_(due_ids),
+        claimable,
+    ).update(
+        {
+            OutboundEmail.status: "sending",
+            OutboundEmail.claim_token: token,
+            OutboundEmail.attempts: OutboundEmail.attempts + 1,
+            OutboundEmail.next_attempt_at: current_time_utc + timedelta(seconds=lease_seconds),
+        },
+        synchronize_session=False,
+    )
+    db.session.commit()
+    return OutboundEmail.query.filter_by(claim_token=token, status="sending").all()
+
+
+@timed("storage.mark_email_sent")
+def mark_email_sent(email):
+    email.status = "sent"
+    email.sent_at = now_utc()
+    email.last_error = None
+    db.session.commit()
+
+
+@timed("storage.mark_email_failed")
+def mark_email_failed(email, error, retry_in_seconds=None):
+    """Schedules a retry after `retry_in_seconds`, or gives up when it is None."""
+    email.last_error = str(error)[:255]
+    if retry_in_seconds is None:
+        email.status = "failed"
+    else:
+        email.status = "queued"
+        email.next_attempt_at = now_utc() + timedelta(seconds=retry_in_seconds)
     db.session.commit()
-    return complaint
\ No newline at end of file
@@ -0,0 +1,29 @@
+import time
+
+from benchmarks.corpus import synthetic_corpus
+from benchmarks.harness import time_calls
+
+BATCH_SIZE = 256
+
+
+def run(results, n_texts=2000):
+    """Single-call latency and batch throughput, with the prediction cache off."""
+    from backend import classifier
+
+    texts = synthetic_corpus(n_texts, seed=1)["complaint_text"].tolist()
+    cache_size = classifier.prediction_cache.maxsize
+    classifier.prediction_cache.clear()
+    classifier.prediction_cache.maxsize = 0
+    try:
+        classifier.reload_models(force=True)
+
+        samples = time_calls(classifier.classify_complaint_text, [(text,) for text in texts])
+        results.add_latency("classify.single", samples)
+
+        batches = [texts[i:i + BATCH_SIZE] for i in range(0, len(texts), BATCH_SIZE)]
+        start = time.perf_counter()
+        for batch in batches:
+            classifier.classify_batch(batch)
+        results.add("classify.batch.texts_per_sec", len(texts) / (time.perf_counter() - start), "texts/s", "higher")
+    finally:
+        classifier.prediction_cache.maxsize = cache_size
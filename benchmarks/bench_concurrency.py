@@ -0,0 +1,105 @@
+import time
+import uuid
+import multiprocessing
+from datetime import datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+
+WRITERS = 4
+READERS = 4
+DURATION_SECONDS = 5.0
+
+
+def _engine(url, profile):
+    from database.tuning import engine_options, install_tuning
+
+    engine = create_engine(url, **engine_options(url, profile))
+    install_tuning(engine, profile)
+    return engine
+
+
+def _writer(url, profile, deadline, out):
+    """One /submit per transaction: a complaint and its first status log."""
+    from database.models import Complaint, StatusLog
+
+    engine = _engine(url, profile)
+    committed = locked = 0
+    while time.time() < deadline:
+        complaint_id = uuid.uuid4().hex[:12].upper()
+        now = datetime.utcnow()
+        try:
+            with engine.begin() as conn:
+                conn.execute(Complaint.__table__.insert(), {
+                    "complaint_id": complaint_id, "user_input": "Streetlight not working near the park",
+                    "category": "Electricity", "subcategory": "StreetLight", "urgency": "Low",
+                    "status": "Pending", "assigned_to": "bench@example.com",
+                    "created_at": now, "updated_at": now,
+                })
+                conn.execute(StatusLog.__table__.insert(), {
+                    "complaint_id": complaint_id, "status": "Pending",
+                    "assigned_to": "bench@example.com", "timestamp": now,
+                })
+            committed += 1
+        except OperationalError:
+            locked += 1
+    engine.dispose()
+    out.put(("write", committed, locked))
+
+
+def _reader(url, profile, deadline, out):
+    """Listing pages, as the admin panel and tracking pages poll them."""
+    from database.models import Complaint
+
+    engine = _engine(url, profile)
+    table = Complaint.__table__
+    query = select(table.c.complaint_id, table.c.status).order_by(table.c.created_at.desc()).limit(50)
+    reads = locked = 0
+    while time.time() < deadline:
+        try:
+            with engine.connect() as conn:
+                conn.execute(query).all()
+            reads += 1
+        except OperationalError:
+            locked += 1
+    engine.dispose()
+    out.put(("read", reads, locked))
+
+
+def run_profile(url, profile, writers=WRITERS, readers=READERS, duration=DURATION_SECONDS):
+    """Runs writer and reader processes against one database; returns totals."""
+    from database.models import db
+
+    engine = _engine(url, profile)
+    db.metadata.create_all(engine)
+    engine.dispose()
+
+    out = multiprocessing.Queue()
+    deadline = time.time() + duration
+    processes = [
+        multiprocessing.Process(target=_writer, args=(url, profile, deadline, out)) for _ in range(writers)
+    ] + [
+        multiprocessing.Process(target=_reader, args=(url, profile, deadline, out)) for _ in range(readers)
+    ]
+    for process in processes:
+        process.start()
+    totals = {"write": [0, 0], "read": [0, 0]}
+    for _ in processes:
+        kind, done, locked = out.get()
+        totals[kind][0] += done
+        totals[kind][1] += locked
+    for process in processes:
+        process.join()
+    return totals
+
+
+def run(results, workspace, duration=DURATION_SECONDS):
+    """Concurrent write throughput under the default and tuned SQLite profiles."""
+    for profile in ("default", "tuned"):
+        url = f"sqlite:///{workspace / f'concurrency_{profile}.db'}"
+        totals = run_profile(url, profile, duration=duration)
+        writes, write_errors = totals["write"]
+        reads, read_errors = totals["read"]
+        results.add(f"db.{profile}.writes_per_sec", writes / duration, "writes/s", "higher")
+        results.add(f"db.{profile}.reads_per_sec", reads / duration, "reads/s", "higher")
+        results.add(f"db.{profile}.locked_errors", write_errors + read_errors, "errors")
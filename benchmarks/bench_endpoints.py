@@ -0,0 +1,115 @@
+import time
+import random
+from datetime import datetime, timedelta
+
+from benchmarks.corpus import synthetic_corpus
+from benchmarks.harness import time_calls
+
+INSERT_CHUNK = 10000
+
+
+def seed_complaints(db, n_rows):
+    """Bulk-inserts `n_rows` synthetic complaints (with one status log each)."""
+    from database.models import Complaint, StatusLog
+
+    corpus = synthetic_corpus(n_rows, seed=2)
+    start = datetime.utcnow() - timedelta(days=365)
+    ids = [f"B{i:09d}" for i in range(n_rows)]
+    for offset in range(0, n_rows, INSERT_CHUNK):
+        complaints, logs = [], []
+        for i in range(offset, min(offset + INSERT_CHUNK, n_rows)):
+            row = corpus.iloc[i]
+            created_at = start + timedelta(seconds=i * 30)
+            complaints.append({
+                "complaint_id": ids[i], "user_input": row["complaint_text"], "category": row["category"],
+                "subcategory": row["subcategory"], "urgency": row["urgency"], "status": "Pending",
+                "assigned_to": "bench@example.com", "created_at": created_at, "updated_at": created_at,
+            })
+            logs.append({
+                "complaint_id": ids[i], "status": "Pending", "assigned_to": "bench@example.com",
+                "timestamp": created_at,
+            })
+        db.session.execute(Complaint.__table__.insert(), complaints)
+        db.session.execute(StatusLog.__table__.insert(), logs)
+        db.session.commit()
+    return ids
+
+
+def ensure_seeded(db, n_rows):
+    """Seeds the table once per workspace; later suites reuse the same rows."""
+    from database.models import Complaint
+
+    if db.session.query(Complaint.complaint_id).filter(Complaint.complaint_id.like("B%")).first():
+        return [f"B{i:09d}" for i in range(n_rows)]
+    return seed_complaints(db, n_rows)
+
+
+def run(results, db_rows):
+    """End-to-end latency through the Flask test client on a seeded table."""
+    import main
+    from database.models import db
+    from backend.blueprints.user import INGEST_KEY
+    from backend.blueprints.admin import ADMIN_KEY
+
+    main.create_database()
+    with main.app.app_context():
+        ids = ensure_seeded(db, db_rows)
+
+    client = main.app.test_client()
+    texts = synthetic_corpus(300, seed=3)["complaint_text"].tolist()
+
+    def post(path, payload):
+        response = client.post(path, json=payload)
+        assert response.status_code == 200, (path, response.status_code, response.get_data(as_text=True))
+
+    def get(path):
+        response = client.get(path)
+        assert response.status_code == 200, (path, response.status_code)
+
+    results.add_latency("http.predict", time_calls(post, [("/predict", {"complaint_text": t}) for t in texts]))
+
+    predictions = [client.post("/predict", json={"complaint_text": t}).get_json() for t in texts[:200]]
+    results.add_latency("http.submit", time_calls(post, [("/submit", p) for p in predictions]))
+
+    bulk_texts = synthetic_corpus(20000, seed=6)["complaint_text"].tolist()
+    start = time.perf_counter()
+    response = client.post("/bulk_submit", json=bulk_texts, headers={"X-Ingest-Key": INGEST_KEY})
+    assert response.status_code == 200 and response.get_json()["accepted"] == len(bulk_texts)
+    results.add("http.bulk_submit.rows_per_sec", len(bulk_texts) / (time.perf_counter() - start), "rows/s", "higher")
+
+    rng = random.Random(4)
+    lookups = [(f"/get_status/{rng.choice(ids)}",) for _ in range(300)]
+    results.add_latency("http.get_status", time_calls(get, lookups))
+    # A citizen's tracking page polling the same complaint
+    results.add_latency("http.get_status.repeat", time_calls(get, [lookups[0]] * 300))
+
+    with main.app.app_context():
+        from backend.storage import rebuild_stats
+        rebuild_stats()  # seeded rows bypass the write paths that maintain it
+    results.add_latency("http.stats", time_calls(get, [(f"/stats?key={ADMIN_KEY}",)] * 100, warmup=2))
+
+    # Keyset pages should cost the same at the head and the tail of the table
+    with main.app.app_context():
+        from backend.storage import encode_cursor, read_complaint
+        deep_cursor = encode_cursor(read_complaint(ids[min(100, len(ids) - 1)]))
+    pages = {
+        "first_page": "/all_complaints",
+        "deep_page": f"/all_complaints?cursor={deep_cursor}",
+        "filtered": "/all_complaints?urgency=High&status=Pending",
+    }
+    for label, path in pages.items():
+        results.add_latency(f"http.all_complaints.{label}", time_calls(get, [(path,)] * 50, warmup=2))
+
+    # Cost of one timed span, net of the call itself
+    from backend.metrics import timed
+    calls = 200000
+    plain = lambda: None
+    wrapped = timed("bench.noop")(plain)
+    start = time.perf_counter()
+    for _ in range(calls):
+        plain()
+    baseline = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(calls):
+        wrapped()
+    results.add("metrics.span_overhead_us", max(0.0, time.perf_counter() - start - baseline) / calls * 1e6, "us")
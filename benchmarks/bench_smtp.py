@@ -0,0 +1,83 @@
+import time
+import socket
+
+N_MESSAGES = 200
+
+
+class _Sink:
+    """aiosmtpd handler that accepts and discards every message."""
+
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def _accept_any(server, session, envelope, mechanism, auth_data):
+    from aiosmtpd.smtp import AuthResult
+
+    return AuthResult(success=True)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _send_one_by_one(sender, messages):
+    start = time.perf_counter()
+    for subject, body, to_email in messages:
+        sender.send_email(subject, body, to_email)
+    return time.perf_counter() - start
+
+
+def _send_batched(sender, messages, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(messages), batch_size):
+        sender.send_many(messages[i:i + batch_size])
+    return time.perf_counter() - start
+
+
+def run(results, n_messages=N_MESSAGES, batch_size=20):
+    """
+    Per-message SMTP cost against a local aiosmtpd server, with a fresh
+    connection per message versus connections reused from the pool.
+    """
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        print("  aiosmtpd is not installed; skipping the SMTP benchmark.")
+        return
+
+    from backend.email_sender import RealEmailSender
+
+    port = _free_port()
+    handler = _Sink()
+    controller = Controller(
+        handler, hostname="127.0.0.1", port=port,
+        authenticator=_accept_any, auth_require_tls=False,
+    )
+    controller.start()
+    messages = [(f"Complaint {i}", "Benchmark body", "dept@example.com") for i in range(n_messages)]
+    # idle_timeout=0 never reuses a connection, which is how every email
+    # used to be sent: one connect + login per message
+    runs = [
+        ("unpooled", 0.0, lambda sender: _send_one_by_one(sender, messages)),
+        ("pooled", 60.0, lambda sender: _send_one_by_one(sender, messages)),
+        ("pooled_batch", 60.0, lambda sender: _send_batched(sender, messages, batch_size)),
+    ]
+    try:
+        for label, idle_timeout, send in runs:
+            sender = RealEmailSender(
+                "127.0.0.1", port, "bench", "bench",
+                security="none", pool_size=1, idle_timeout=idle_timeout,
+            )
+            elapsed = send(sender)
+            sender.pool.close()
+            results.add(f"smtp.{label}.ms_per_message", elapsed / n_messages * 1000, "ms")
+            results.add(f"smtp.{label}.connections_per_message", sender.pool.connections_opened / n_messages, "conn/msg")
+    finally:
+        controller.stop()
@@ -0,0 +1,97 @@
+import time
+import random
+from datetime import datetime
+
+from benchmarks.harness import time_calls
+from benchmarks.bench_endpoints import ensure_seeded
+
+ADMIN_COLUMNS = ("complaint_id", "user_input", "created_at", "status", "assigned_to")
+
+
+def run(results, db_rows, n_lookups=2000):
+    """
+    Storage read paths: full ORM instances (the old way) against the
+    column-projected rows the endpoints now use, on the same seeded table.
+    """
+    import main
+    from sqlalchemy import select, bindparam
+    from database.models import db, Complaint, StatusLog
+    from backend import storage
+
+    main.create_database()
+    with main.app.app_context():
+        ids = ensure_seeded(db, db_rows)
+        rng = random.Random(5)
+        lookups = [(rng.choice(ids),) for _ in range(n_lookups)]
+
+        def orm_complaint(complaint_id):
+            Complaint.query.filter_by(complaint_id=complaint_id).first()
+            db.session.expunge_all()
+
+        def orm_status_logs(complaint_id):
+            StatusLog.query.filter_by(complaint_id=complaint_id).order_by(StatusLog.timestamp).all()
+            db.session.expunge_all()
+
+        # The per-complaint log query /get_status ran before it was folded
+        # into storage.read_complaint_with_logs
+        logs_table = StatusLog.__table__
+        logs_by_complaint = (
+            select(logs_table.c.status, logs_table.c.assigned_to, logs_table.c.timestamp)
+            .where(logs_table.c.complaint_id == bindparam("complaint_id"))
+            .order_by(logs_table.c.timestamp)
+        )
+
+        def projected_status_logs(complaint_id):
+            db.session.execute(logs_by_complaint, {"complaint_id": complaint_id}).all()
+
+        def orm_page():
+            Complaint.query.order_by(Complaint.created_at.desc(), Complaint.complaint_id.desc()).limit(51).all()
+            db.session.expunge_all()
+
+        paths = [
+            ("complaint", orm_complaint, storage.read_complaint, lookups),
+            ("status_logs", orm_status_logs, projected_status_logs, lookups),
+            ("page", orm_page, lambda: storage.page_complaints(ADMIN_COLUMNS), [()] * 500),
+        ]
+        for name, orm_fn, projected_fn, args in paths:
+            results.add_latency(f"storage.{name}.orm", time_calls(orm_fn, args))
+            results.add_latency(f"storage.{name}.projected", time_calls(projected_fn, args))
+        db.session.remove()
+
+
+def run_id_schemes(results, workspace, n_rows=300000, batch_size=1000):
+    """
+    Insert throughput into a growing complaints table with random and
+    time-ordered primary keys, each in its own SQLite file.
+    """
+    from sqlalchemy import create_engine
+    from database.models import db, Complaint
+    from database.tuning import engine_options, install_tuning
+    from backend.ids import SortableIdGenerator, random_id
+
+    for scheme, generate in (("random", random_id), ("sortable", SortableIdGenerator(node=1))):
+        url = f"sqlite:///{workspace / f'ids_{scheme}.db'}"
+        engine = create_engine(url, **engine_options(url))
+        install_tuning(engine)
+        db.metadata.create_all(engine)
+
+        inserted, start = set(), time.perf_counter()
+        for offset in range(0, n_rows, batch_size):
+            rows = []
+            now = datetime.utcnow()
+            while len(rows) < batch_size:
+                complaint_id = generate()
+                if complaint_id in inserted:  # random 32-bit IDs do collide
+                    continue
+                inserted.add(complaint_id)
+                rows.append({
+                    "complaint_id": complaint_id, "user_input": "Garbage not collected for 3 days",
+                    "category": "Sanitation", "subcategory": "Garbage", "urgency": "Medium",
+                    "status": "Pending", "assigned_to": "bench@example.com",
+                    "created_at": now, "updated_at": now,
+                })
+            with engine.begin() as conn:
+                conn.execute(Complaint.__table__.insert(), rows)
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+        results.add(f"storage.insert.{scheme}_ids.rows_per_sec", n_rows / elapsed, "rows/s", "higher")
@@ -0,0 +1,21 @@
+import time
+
+from benchmarks.corpus import write_corpus
+from benchmarks.harness import time_calls
+
+
+def run(results, workspace, sizes, workers):
+    """Fit time for each corpus size, then load time of the last model trained."""
+    from ml_models import trainall
+    from backend.classifier import CompiledScorer
+
+    version_dir = None
+    for size in sizes:
+        corpus = write_corpus(size, workspace / f"corpus_{size}.csv")
+        start = time.perf_counter()
+        version_dir = trainall.train_all(corpus, workers=workers)
+        results.add(f"train.fit.{size}_rows.seconds", time.perf_counter() - start, "s")
+
+    samples = time_calls(CompiledScorer.load, [(version_dir,)] * 50)
+    results.add_latency("model.load", samples)
+    return version_dir
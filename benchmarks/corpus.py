@@ -0,0 +1,30 @@
+import random
+
+import pandas as pd
+
+from paths import DATASET_PATH
+
+# Extra tokens mixed into synthetic rows so texts are not exact repeats
+PLACES = [
+    "Civil Lines", "MG Road", "Sanjay Nagar", "Old Market", "Rajpur", "Lal Bagh", "Station Road",
+    "Model Town", "Ashok Vihar", "Gandhi Chowk", "Nehru Colony", "Sector", "Ward", "Block",
+]
+
+
+def synthetic_corpus(n_rows, seed=0):
+    """
+    Scales the bundled complaints.csv to `n_rows` by resampling its rows and
+    appending a random locality, so labels follow the real distribution.
+    """
+    base = pd.read_csv(DATASET_PATH)
+    rng = random.Random(seed)
+    rows = base.sample(n=n_rows, replace=True, random_state=seed).reset_index(drop=True)
+    rows["complaint_text"] = [
+        f"{text} near {rng.choice(PLACES)} {rng.randint(1, 999)}" for text in rows["complaint_text"]
+    ]
+    return rows
+
+
+def write_corpus(n_rows, path, seed=0):
+    synthetic_corpus(n_rows, seed).to_csv(path, index=False)
+    return path
@@ -0,0 +1,104 @@
+import json
+import time
+import platform
+from pathlib import Path
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+# Units that count events: from a zero baseline, any rise is a regression
+COUNT_UNITS = ("errors",)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_calls(fn, args_list, warmup=5):
+    """Calls fn(*args) for each args tuple and returns per-call seconds."""
+    for args in args_list[:warmup]:
+        fn(*args)
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class Results:
+    """
+    Benchmark metrics, each with a unit and whether lower or higher is
+    better, plus the run settings they were measured with.
+    """
+
+    def __init__(self, settings=None):
+        self.metrics = {}
+        self.settings = settings or {}
+
+    def add(self, name, value, unit, better="lower"):
+        self.metrics[name] = {"value": round(value, 6), "unit": unit, "better": better}
+        print(f"  {name:<48} {value:>14.4f} {unit}")
+
+    def add_latency(self, name, samples):
+        self.add(f"{name}.p50_ms", percentile(samples, 50) * 1000, "ms")
+        self.add(f"{name}.p99_ms", percentile(samples, 99) * 1000, "ms")
+
+    def to_json(self):
+        return {
+            "python": platform.python_version(), "machine": platform.machine(),
+            "settings": self.settings, "metrics": self.metrics,
+        }
+
+
+def baseline_path(name):
+    return BASELINE_DIR / f"{name}.json"
+
+
+def save_baseline(results, name):
+    BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(baseline_path(name), "w", encoding="utf-8") as f:
+        json.dump(results.to_json(), f, indent=2, sort_keys=True)
+
+
+def compare(results, name, tolerance, min_delta_ms=0.25):
+    """
+    Returns a message per metric that got worse than the saved baseline by
+    more than `tolerance` (a fraction, e.g. 0.25 for 25%). Latency changes
+    smaller than `min_delta_ms` are treated as timer noise. A count (see
+    COUNT_UNITS) that was 0 fails on any rise. Raises FileNotFoundError if
+    the baseline has not been recorded, and ValueError if it was recorded
+    with different settings.
+    """
+    path = baseline_path(name)
+    if not path.exists():
+        raise FileNotFoundError(f"No baseline '{name}' at {path}")
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != results.settings:
+        raise ValueError(
+            f"Baseline '{name}' was recorded with settings {baseline.get('settings')}, "
+            f"this run used {results.settings}"
+        )
+    baseline = baseline["metrics"]
+
+    regressions = []
+    for metric, current in results.metrics.items():
+        previous = baseline.get(metric)
+        if not previous:
+            continue
+        if not previous["value"]:
+            if current["unit"] in COUNT_UNITS and current["better"] == "lower" and current["value"] > 0:
+                regressions.append(f"{metric}: 0 -> {current['value']:g} {current['unit']}")
+            continue
+        if current["unit"] == "ms" and abs(current["value"] - previous["value"]) < min_delta_ms:
+            continue
+        change = (current["value"] - previous["value"]) / previous["value"]
+        if current["better"] == "higher":
+            change = -change
+        if change > tolerance:
+            regressions.append(
+                f"{metric}: {previous['value']:.4f} -> {current['value']:.4f} {current['unit']} "
+                f"({change:+.0%} worse)"
+            )
+    return regressions
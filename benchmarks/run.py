@@ -0,0 +1,116 @@
+"""
+Benchmark suite for training, inference and the HTTP endpoints.
+
+Run from the project root:
+
+    python -m benchmarks.run                      # 10k-row corpus, compare to baseline
+    python -m benchmarks.run --sizes 10000,100000,1000000 --db-rows 100000
+    python -m benchmarks.run --save-baseline      # record the current numbers
+
+Everything runs in a scratch workspace (models and SQLite database), so the
+real trained_data/ and database are never touched. The exit code is 1 when
+any metric is worse than the saved baseline by more than --tolerance, and 2
+when nothing could be compared: the baseline is missing (unless
+--allow-missing-baseline) or was recorded with other --sizes, --db-rows or
+--workers.
+"""
+import os
+import sys
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+SUITES = ["training", "classifier", "endpoints", "storage", "concurrency", "smtp"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the Smart Complaint Box benchmarks.")
+    parser.add_argument("--sizes", default="10000", help="comma-separated synthetic corpus sizes to train on")
+    parser.add_argument("--db-rows", type=int, default=10000, help="complaints seeded for the endpoint and storage benchmarks")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"comma-separated subset of {SUITES}")
+    parser.add_argument("--workers", type=int, default=0, help="training processes (0 = TRAIN_WORKERS)")
+    parser.add_argument("--baseline", default="default", help="baseline name under benchmarks/baselines/")
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--allow-missing-baseline", action="store_true", help="exit 0 when there is no baseline to compare")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    suites = [suite.strip() for suite in args.only.split(",")]
+
+    workspace = Path(tempfile.mkdtemp(prefix="scb-bench-"))
+    os.environ["TRAINED_DATA_DIR"] = str(workspace / "trained_data")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workspace / 'bench.db'}"
+    # The suites set up the database and models themselves
+    os.environ["BACKGROUND_SERVICES"] = "false"
+
+    # Project modules read the environment at import time
+    from benchmarks import (
+        bench_classifier, bench_concurrency, bench_endpoints, bench_smtp, bench_storage, bench_training,
+    )
+    from benchmarks.harness import Results, compare, save_baseline
+    from ml_models.trainall import TRAIN_WORKERS
+
+    logging.disable(logging.WARNING)
+    workers = args.workers or TRAIN_WORKERS
+    # Baselines are only comparable with runs using the same settings
+    results = Results({"sizes": sizes, "db_rows": args.db_rows, "workers": workers})
+    try:
+        if "training" in suites:
+            print("Training")
+            bench_training.run(results, workspace, sizes, workers)
+        elif "classifier" in suites or "endpoints" in suites:
+            from ml_models import trainall
+            from benchmarks.corpus import write_corpus
+            trainall.train_all(write_corpus(sizes[0], workspace / "corpus.csv"), workers=workers)
+
+        if "classifier" in suites:
+            print("Classifier")
+            bench_classifier.run(results)
+        if "endpoints" in suites:
+            print("Endpoints")
+            bench_endpoints.run(results, args.db_rows)
+        if "storage" in suites:
+            print("Storage")
+            bench_storage.run(results, args.db_rows)
+            bench_storage.run_id_schemes(results, workspace)
+        if "concurrency" in suites:
+            print("Concurrency")
+            bench_concurrency.run(results, workspace)
+        if "smtp" in suites:
+            print("SMTP")
+            bench_smtp.run(results)
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results.to_json(), f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline '{args.baseline}' saved.")
+        return 0
+
+    try:
+        regressions = compare(results, args.baseline, args.tolerance)
+    except FileNotFoundError as e:
+        print(f"WARNING: {e}. Nothing was compared; record one with --save-baseline.")
+        return 0 if args.allow_missing_baseline else 2
+    except ValueError as e:
+        print(f"WARNING: {e}. Nothing was compared; rerun with those settings or use another --baseline.")
+        return 2
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
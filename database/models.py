@@ -15,6 +15,19 @@ class Complaint(db.Model):
     assigned_to = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 1 = level-1 department, 2 and 3 after SLA escalations
+    escalation_level = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    # Keyset pagination: newest-first listing, optionally filtered on one column
+    __table_args__ = (
+        db.Index("ix_complaints_created", "created_at", "complaint_id"),
+        db.Index("ix_complaints_status_created", "status", "created_at", "complaint_id"),
+        db.Index("ix_complaints_category_created", "category", "created_at", "complaint_id"),
+        db.Index("ix_complaints_urgency_created", "urgency", "created_at", "complaint_id"),
+        db.Index("ix_complaints_assigned_created", "assigned_to", "created_at", "complaint_id"),
+        # Escalation scans: open complaints of one urgency and level, oldest first
+        db.Index("ix_complaints_escalation", "status", "urgency", "escalation_level", "created_at"),
+    )
 
     def __repr__(self):
         return f"<Complaint {self.complaint_id} {self.category}/{self.subcategory} {self.status}>"
@@ -36,6 +49,17 @@ class Department(db.Model):
     def __repr__(self):
         return f"<Department {self.category}/{self.subcategory}>"
 
+class RoutingVersion(db.Model):
+    __tablename__ = 'routing_version'
+
+    # Single row (id = 1), bumped on every departments change so workers
+    # know when to reload their routing table
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<RoutingVersion {self.version}>"
+
 class StatusLog(db.Model):
     __tablename__ = 'status_log'
     
@@ -50,5 +74,46 @@ class StatusLog(db.Model):
         backref=db.backref('status_logs', lazy=True, cascade="all, delete-orphan")
     )
 
+    # Status lookups read one complaint's history in timestamp order
+    __table_args__ = (
+        db.Index("ix_status_log_complaint_timestamp", "complaint_id", "timestamp"),
+    )
+
+    def __repr__(self):
+        return f"<StatusLog {self.complaint_id} {self.status} at {self.timestamp}>"
+
+class ComplaintStat(db.Model):
+    __tablename__ = 'complaint_stats'
+
+    # dimension: status / category / urgency / department / day
+    dimension = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ComplaintStat {self.dimension}={self.value}: {self.count}>"
+
+class OutboundEmail(db.Model):
+    __tablename__ = 'outbound_emails'
+
+    email_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    complaint_id = db.Column(db.String(50))
+    to_email = db.Column(db.String(100), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued / sending / sent / failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # False for emails that always go out on their own (escalations)
+    digestible = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claim_token = db.Column(db.String(32))
+    last_error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_outbound_emails_status_next_attempt", "status", "next_attempt_at"),
+    )
+
     def __repr__(self):
-        return f"<StatusLog {self.complaint_id} {self.status} at {self.timestamp}>"
\ No newline at end of file
+        return f"<OutboundEmail {self.email_id} {self.to_email} {self.status}>"
\ No newline at end of file
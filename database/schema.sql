@@ -1,7 +1,10 @@
 -- Drop existing tables if needed (for fresh dev setup)
+DROP TABLE IF EXISTS outbound_emails;
+DROP TABLE IF EXISTS complaint_stats;
 DROP TABLE IF EXISTS status_log;
 DROP TABLE IF EXISTS complaints;
 DROP TABLE IF EXISTS departments;
+DROP TABLE IF EXISTS routing_version;
 
 -- ===========================
 -- Complaints Table
@@ -15,9 +18,20 @@ CREATE TABLE complaints (
     status       VARCHAR(20) DEFAULT 'Pending',
     assigned_to  VARCHAR(100),
     created_at   DATETIME DEFAULT CURRENT_TIMESTAMP,
-    updated_at   DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    updated_at   DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    escalation_level INT NOT NULL DEFAULT 1
 );
 
+-- Keyset pagination (newest first, optionally filtered on one column)
+CREATE INDEX ix_complaints_created ON complaints (created_at, complaint_id);
+CREATE INDEX ix_complaints_status_created ON complaints (status, created_at, complaint_id);
+CREATE INDEX ix_complaints_category_created ON complaints (category, created_at, complaint_id);
+CREATE INDEX ix_complaints_urgency_created ON complaints (urgency, created_at, complaint_id);
+CREATE INDEX ix_complaints_assigned_created ON complaints (assigned_to, created_at, complaint_id);
+
+-- Escalation scans (open complaints of one urgency and level, oldest first)
+CREATE INDEX ix_complaints_escalation ON complaints (status, urgency, escalation_level, created_at);
+
 -- ===========================
 -- Departments Table
 -- ===========================
@@ -31,6 +45,15 @@ CREATE TABLE departments (
     CONSTRAINT uq_category_subcategory UNIQUE (category, subcategory)
 );
 
+-- ===========================
+-- Routing Version
+-- ===========================
+-- Single row, bumped on every departments change
+CREATE TABLE routing_version (
+    id      INT PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0
+);
+
 -- ===========================
 -- Status Log Table
 -- ===========================
@@ -43,4 +66,39 @@ CREATE TABLE status_log (
     CONSTRAINT fk_status_complaint FOREIGN KEY (complaint_id)
         REFERENCES complaints (complaint_id)
         ON DELETE CASCADE
-);
\ No newline at end of file
+);
+
+CREATE INDEX ix_status_log_complaint_timestamp ON status_log (complaint_id, timestamp);
+
+-- ===========================
+-- Dashboard Statistics
+-- ===========================
+-- Running counts per status / category / urgency / department / day,
+-- maintained in the same transaction as each complaint write
+CREATE TABLE complaint_stats (
+    dimension VARCHAR(20) NOT NULL,
+    value     VARCHAR(100) NOT NULL,
+    count     INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+);
+
+-- ===========================
+-- Outbound Email Queue
+-- ===========================
+CREATE TABLE outbound_emails (
+    email_id        INT AUTO_INCREMENT PRIMARY KEY,
+    complaint_id    VARCHAR(50),
+    to_email        VARCHAR(100) NOT NULL,
+    subject         VARCHAR(255) NOT NULL,
+    body            TEXT NOT NULL,
+    status          VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts        INT NOT NULL DEFAULT 0,
+    digestible      BOOLEAN NOT NULL DEFAULT TRUE,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    claim_token     VARCHAR(32),
+    last_error      VARCHAR(255),
+    created_at      DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sent_at         DATETIME
+);
+
+CREATE INDEX ix_outbound_emails_status_next_attempt ON outbound_emails (status, next_attempt_at);
\ No newline at end of file
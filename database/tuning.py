@@ -0,0 +1,78 @@
+import os
+import logging
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger("db-tuning")
+
+# "tuned" applies the settings below; "default" leaves the driver defaults
+DB_PROFILE = os.getenv("DB_PROFILE", "tuned").lower()
+
+# Pool settings (ignored for in-memory SQLite, which uses a single connection)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle MySQL connections before the server's wait_timeout drops them
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "280"))
+
+# SQLite pragmas, run on every new connection
+SQLITE_PRAGMAS = {
+    # Readers no longer block the writer, and the writer no longer blocks readers
+    "journal_mode": "WAL",
+    # Safe with WAL: a power loss can drop the last commits, never corrupt the file
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    # Wait for the write lock instead of failing with "database is locked"
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative values are KiB
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),
+    "temp_store": "MEMORY",
+}
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(database_url, profile=DB_PROFILE):
+    """SQLAlchemy create_engine() keyword arguments for this database and profile."""
+    url = make_url(database_url)
+    if profile != "tuned" or _is_memory_sqlite(url):
+        return {}
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    if url.get_backend_name() == "mysql":
+        options.update(pool_recycle=DB_POOL_RECYCLE, pool_pre_ping=True)
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def install_tuning(engine, profile=DB_PROFILE):
+    """
+    Registers the SQLite pragmas on `engine` so every pooled connection gets
+    them. Does nothing for other databases, in-memory SQLite, or the
+    "default" profile.
+    """
+    if profile != "tuned" or engine.dialect.name != "sqlite" or _is_memory_sqlite(engine.url):
+        return False
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    logger.info("⚙️ SQLite tuning enabled (WAL, synchronous=%s).", SQLITE_PRAGMAS["synchronous"])
+    return True
@@ -1,8 +1,17 @@
 import os
 import sys
 import logging
-from flask import Flask
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+from flask import Flask, Response, jsonify
 from dotenv import load_dotenv
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent setup relies on the "already exists" retry
+    fcntl = None
 
 # Internal imports
 from paths import BACKEND_DIR, DEFAULT_SQLITE_URL, DATABASE_DIR
@@ -11,11 +20,15 @@ from paths import BACKEND_DIR, DEFAULT_SQLITE_URL, DATABASE_DIR
 sys.path.append(str(BACKEND_DIR))
 
 # Local backend modules
-from database.models import db
+from database.models import db, Department
+from database.tuning import engine_options, install_tuning
 from blueprints.user import user_bp
 from blueprints.admin import admin_bp
 from email_sender import get_email_sender
-from ml_models import trainall
+from backend.classifier import warm_up, model_status, install_reload_signal
+from backend import mail_queue, escalation, metrics, profiler
+from backend.storage import ensure_stats, seed_departments
+from backend import router
 
 # ------------------------------------------------
 # Load environment variables
@@ -38,6 +51,8 @@ app = Flask(
 os.makedirs(DATABASE_DIR, exist_ok=True)
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", DEFAULT_SQLITE_URL)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Pool sizes and SQLite pragmas from the DB_PROFILE storage profile
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
 db.init_app(app)
 
 # ------------------------------------------------
@@ -46,26 +61,109 @@ db.init_app(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("smart-complaint-box")
 
+with app.app_context():
+    install_tuning(db.engine)
+
 # ------------------------------------------------
 # Helper Functions
 # ------------------------------------------------
+def add_missing_columns():
+    """Adds model columns missing from existing tables (nullable or with a server default)."""
+    inspector = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                logger.warning(f"⚠ Cannot add NOT NULL column {table.name}.{column.name} without a server default.")
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(db.engine.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            with db.engine.begin() as conn:
+                conn.execute(db.text(ddl))
+            logger.info(f"🧱 Added column {table.name}.{column.name}")
+
+# Serializes schema setup between workers on one host
+SCHEMA_LOCK_FILE = Path(os.getenv(
+    "SCHEMA_LOCK_FILE", Path(tempfile.gettempdir()) / "smart_complaint_box-schema.lock"
+))
+
+@contextmanager
+def schema_lock():
+    """Holds SCHEMA_LOCK_FILE (blocking) for the duration of the block."""
+    if fcntl is None:
+        yield
+        return
+    with open(SCHEMA_LOCK_FILE, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield  # closing the file releases the lock
+
+def migrate_schema():
+    db.create_all()
+    # create_all() skips tables that already exist, so add any columns
+    # and indexes introduced after the table was first created
+    add_missing_columns()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def _already_exists(error):
+    message = str(error.orig).lower()
+    return "already exists" in message or "duplicate column" in message
+
 def create_database():
-    with app.app_context():
-        db.create_all()
+    # Each "already exists" means another process just created one table,
+    # column or index, so there are at most that many of them to lose
+    attempts = sum(1 + len(table.columns) + len(table.indexes) for table in db.metadata.sorted_tables)
+    with app.app_context(), schema_lock():
+        for attempt in range(attempts):
+            try:
+                migrate_schema()
+                break
+            except (OperationalError, ProgrammingError) as e:
+                # Another process (on another host, or without the lock)
+                # created it between our check and our DDL; look again
+                if attempt == attempts - 1 or not _already_exists(e):
+                    raise
+                logger.info(f"🧱 Schema changed underneath us ({e.orig}); checking again.")
         logger.info("✅ Database tables created successfully.")
+        rebuilt = ensure_stats()
+        if rebuilt is not None:
+            logger.info(f"📊 Dashboard statistics built from {rebuilt} existing complaints.")
+        if router.ROUTING_SOURCE == "database":
+            seeded = seed_departments(router.config_rows(router.load_routing_config()))
+            if seeded is not None:
+                logger.info(f"🏢 Departments table seeded with {seeded} routes from routing.json.")
+            router.reload_routing()
+        for problem in router.check_departments(Department.query.all()):
+            logger.warning(f"⚠ Routing mismatch: {problem}")
 
-def check_models():
-    MODEL_DIR = os.path.join("ml_models", "trained_data")
-    REQUIRED_MODELS = ["category_model.pkl", "urgency_model.pkl"]
-    return all(os.path.exists(os.path.join(MODEL_DIR, m)) for m in REQUIRED_MODELS)
+AUTO_TRAIN_MODELS = os.getenv("AUTO_TRAIN_MODELS", "true").lower() == "true"
+# Start the services below when this module is imported by a WSGI server
+# (gunicorn main:app). Benchmarks and scripts that import the app turn it off.
+BACKGROUND_SERVICES = os.getenv("BACKGROUND_SERVICES", "true").lower() == "true"
 
-def train_models_if_missing():
-    if not check_models():
-        logger.info("⚙️  Models missing — training now...")
-        trainall.train_all()
-        logger.info("✅ ML models trained successfully.")
-    else:
-        logger.info("✅ ML models found. Skipping training.")
+def start_model_warm_up():
+    """Loads (or trains, if missing) the ML models without blocking boot."""
+    warm_up(train_if_missing=AUTO_TRAIN_MODELS)
+    logger.info("⚙️  Model warm-up started in the background.")
+    if install_reload_signal():
+        logger.info("🔄 Send SIGHUP to hot-reload the current model version.")
+
+def start_background_services():
+    """
+    Creates missing tables and starts the model warm-up, the mail delivery
+    workers (MAIL_QUEUE_WORKERS of them) and the escalation scheduler in
+    this process.
+    """
+    create_database()
+    start_model_warm_up()
+    mail_queue.start_workers(app)
+    escalation.start_scheduler(app)
 
 # ------------------------------------------------
 # Blueprints Registration
@@ -73,6 +171,32 @@ def train_models_if_missing():
 app.register_blueprint(user_bp)
 app.register_blueprint(admin_bp)
 
+# ------------------------------------------------
+# Request Metrics and Profiling
+# ------------------------------------------------
+metrics.install(app)
+# Idle unless an admin starts a session through /profiler/start
+profiler.install(app)
+
+# ------------------------------------------------
+# Health Checks
+# ------------------------------------------------
+@app.route("/ready")
+def ready():
+    """Readiness probe: 200 once the ML models are loaded, 503 before."""
+    status = model_status()
+    if status["state"] == "not_loaded":
+        # Nothing has started loading in this worker yet; don't wait for a /predict
+        warm_up(train_if_missing=AUTO_TRAIN_MODELS)
+    return jsonify(status), 200 if status["ready"] else 503
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Latency histograms for this worker, in Prometheus text format."""
+    if not metrics.METRICS_ENABLED:
+        return "404: Page not found", 404
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 # ------------------------------------------------
 # Error Handlers
 # ------------------------------------------------
@@ -87,9 +211,20 @@ def not_found(e):
 # ------------------------------------------------
 # App Entry Point
 # ------------------------------------------------
+if __name__ != "__main__" and BACKGROUND_SERVICES:
+    start_background_services()
+
 if __name__ == "__main__":
-    create_database()
-    train_models_if_missing()
+    if sys.argv[1:] == ["init-db"]:
+        # One-shot schema setup, e.g. before starting workers on several hosts
+        create_database()
+        sys.exit(0)
+
+    debug = True
+    # The debug reloader runs this file twice: a watcher process and the
+    # child that serves requests. Only the child starts the services.
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_services()
     port = int(os.environ.get("PORT", 5000))
     logger.info(f"🚀 Starting Smart Complaint Box on http://127.0.0.1:{port}")
-    app.run(debug=True, host="0.0.0.0", port=port)
\ No newline at end of file
+    app.run(debug=debug, host="0.0.0.0", port=port)
\ No newline at end of file
@@ -0,0 +1,190 @@
+import os
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.naive_bayes import MultinomialNB
+
+from paths import DATASET_PATH, TRAINED_DATA_DIR
+from ml_models.trainall import TrainingReport, save_version
+
+TRAINING_COLUMNS = ["complaint_text", "category", "subcategory", "urgency"]
+
+# Rows held in memory at once while streaming
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "50000"))
+
+# Hash space for the streaming vectorizer; only buckets that occur are kept
+STREAM_N_FEATURES = int(os.getenv("STREAM_N_FEATURES", str(2 ** 20)))
+
+
+class CompactHashingVectorizer:
+    """
+    Stateless hashing tokenizer restricted to the buckets seen in training.
+
+    Keeping only the observed buckets gives heads the same compact column
+    space a CountVectorizer vocabulary would, so the compiled store stays
+    small no matter how large `n_features` is.
+    """
+
+    def __init__(self, n_features, columns):
+        self.n_features = n_features
+        self.columns = columns
+        self.hasher = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+
+    def transform(self, texts):
+        return self.hasher.transform(texts)[:, self.columns]
+
+    def get_feature_names_out(self):
+        return self.columns.astype(np.int64)
+
+    def feature_spec(self):
+        return {"type": "hashing", "n_features": self.n_features}
+
+
+def iter_csv_chunks(path=DATASET_PATH, chunk_size=STREAM_CHUNK_SIZE):
+    yield from pd.read_csv(path, usecols=TRAINING_COLUMNS, chunksize=chunk_size)
+
+
+def iter_db_chunks(database_url, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Streams labelled rows straight from the complaints table with a
+    server-side cursor, `chunk_size` rows at a time.
+    """
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    query = text(
+        "SELECT user_input AS complaint_text, category, subcategory, urgency "
+        "FROM complaints WHERE category IS NOT NULL AND urgency IS NOT NULL"
+    )
+    try:
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+            for rows in result.partitions(chunk_size):
+                yield pd.DataFrame(rows, columns=TRAINING_COLUMNS)
+    finally:
+        engine.dispose()
+
+
+def _smooth_idf(df, n_docs):
+    # Same formula as TfidfTransformer(smooth_idf=True)
+    return np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+
+
+def _make_head(columns, idf):
+    tfidf = TfidfTransformer()
+    tfidf.idf_ = idf
+    return {"columns": columns, "tfidf": tfidf, "clf": MultinomialNB()}
+
+
+def _partial_fit(head, counts, target, classes):
+    if head["columns"] is not None:
+        counts = counts[:, head["columns"]]
+    head["clf"].partial_fit(head["tfidf"].transform(counts), target, classes=classes)
+
+
+def train_streaming(make_chunks, n_features=STREAM_N_FEATURES):
+    """
+    Trains every head out-of-core from `make_chunks()`, a callable that
+    returns a fresh iterator of DataFrames each time it is called.
+
+    Pass 1 hashes each chunk to collect document frequencies and label sets.
+    Pass 2 re-hashes it and feeds TF-IDF features to MultinomialNB.partial_fit.
+    Peak memory is bounded by the chunk size and the hash space, not the
+    corpus size. The result is published as a regular model version.
+    """
+    report = TrainingReport()
+    hasher = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+    os.makedirs(TRAINED_DATA_DIR, exist_ok=True)
+
+    n_docs = 0
+    doc_freq = np.zeros(n_features, dtype=np.int64)
+    category_classes, urgency_classes = set(), set()
+    category_docs, category_doc_freq, subcategory_classes = {}, {}, {}
+
+    with report.stage("pass 1: document frequencies"):
+        for chunk in make_chunks():
+            counts = hasher.transform(chunk["complaint_text"])
+            n_docs += counts.shape[0]
+            doc_freq += np.bincount(counts.indices, minlength=n_features)
+            category_classes.update(chunk["category"].unique())
+            urgency_classes.update(chunk["urgency"].unique())
+
+            for cat, rows in chunk.groupby("category").indices.items():
+                key = cat.lower()
+                category_docs[key] = category_docs.get(key, 0) + len(rows)
+                if key not in category_doc_freq:
+                    category_doc_freq[key] = np.zeros(n_features, dtype=np.int64)
+                category_doc_freq[key] += np.bincount(counts[rows].indices, minlength=n_features)
+                subcategory_classes.setdefault(key, set()).update(chunk["subcategory"].iloc[rows].unique())
+
+    if not n_docs:
+        raise ValueError("No training rows found in the streamed source")
+
+    seen = np.flatnonzero(doc_freq)
+    vectorizer = CompactHashingVectorizer(n_features, seen)
+    logging.info(f"✅ {n_docs} rows hashed into {len(seen)} active buckets.")
+
+    heads = {
+        "category": _make_head(None, _smooth_idf(doc_freq[seen], n_docs)),
+        "urgency": _make_head(None, _smooth_idf(doc_freq[seen], n_docs)),
+    }
+    classes = {"category": np.array(sorted(category_classes)), "urgency": np.array(sorted(urgency_classes))}
+
+    subcategory_heads = {}
+    for key, labels in subcategory_classes.items():
+        if len(labels) < 2:
+            logging.warning(f"⚠ Skipping subcategory head for '{key}' (insufficient data).")
+            continue
+        cat_freq = category_doc_freq[key][seen]
+        columns = np.flatnonzero(cat_freq)
+        subcategory_heads[key] = _make_head(columns, _smooth_idf(cat_freq[columns], category_docs[key]))
+        classes[f"subcategory:{key}"] = np.array(sorted(labels))
+    del doc_freq, category_doc_freq
+
+    with report.stage("pass 2: partial fit"):
+        for chunk in make_chunks():
+            counts = vectorizer.transform(chunk["complaint_text"])
+            _partial_fit(heads["category"], counts, chunk["category"].to_numpy(), classes["category"])
+            _partial_fit(heads["urgency"], counts, chunk["urgency"].to_numpy(), classes["urgency"])
+            for cat, rows in chunk.groupby("category").indices.items():
+                head = subcategory_heads.get(cat.lower())
+                if head is not None:
+                    _partial_fit(
+                        head, counts[rows], chunk["subcategory"].iloc[rows].to_numpy(),
+                        classes[f"subcategory:{cat.lower()}"],
+                    )
+
+    with report.stage("save version"):
+        version_dir = save_version(vectorizer, heads, subcategory_heads)
+
+    report.save(version_dir / "training_report.json")
+    logging.info(f"🎉 Streaming training complete: {version_dir.name}.")
+    return version_dir
+
+
+def main():
+    """Command line entry point: python -m ml_models.streaming [--database-url URL]"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="Train the complaint models out-of-core.")
+    parser.add_argument("--csv", default=str(DATASET_PATH), help="CSV file to stream (default: bundled dataset)")
+    parser.add_argument("--database-url", help="stream the complaints table from this database instead")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE)
+    parser.add_argument("--n-features", type=int, default=STREAM_N_FEATURES)
+    args = parser.parse_args()
+
+    # Run as a script this module is __main__; use the importable copy so
+    # the pickled CompactHashingVectorizer loads as ml_models.streaming's
+    from ml_models import streaming
+
+    if args.database_url:
+        streaming.train_streaming(lambda: streaming.iter_db_chunks(args.database_url, args.chunk_size), args.n_features)
+    else:
+        streaming.train_streaming(lambda: streaming.iter_csv_chunks(args.csv, args.chunk_size), args.n_features)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,349 @@
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
 from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import Pipeline
 import joblib
+import json
 import os
+import time
+import shutil
 import logging
+import argparse
+import tracemalloc
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 
 # Centralized paths
-from paths import DATASET_PATH, TRAINED_DATA_DIR, SUBCATEGORY_MODELS_DIR
-
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-
-# Load dataset
-try:
-    df = pd.read_csv(DATASET_PATH)
-    logging.info("✅ Dataset loaded successfully.")
-except FileNotFoundError:
-    logging.error(f"❌ Dataset not found at {DATASET_PATH}")
-    exit()
-
-# Ensure dirs
-os.makedirs(TRAINED_DATA_DIR, exist_ok=True)
-os.makedirs(SUBCATEGORY_MODELS_DIR, exist_ok=True)
-
-
-def train_and_save_model(data, target, filename):
-    pipeline = Pipeline([("tfidf", TfidfVectorizer()), ("clf", MultinomialNB())])
-    pipeline.fit(data, target)
-    joblib.dump(pipeline, TRAINED_DATA_DIR / filename)
-    logging.info(f"✅ {filename} model trained and saved.")
-    return pipeline
-
-
-# Train category + urgency
-category_model = train_and_save_model(df["complaint_text"], df["category"], "category_model.pkl")
-urgency_model = train_and_save_model(df["complaint_text"], df["urgency"], "urgency_model.pkl")
-
-# Train subcategory models
-logging.info("🔄 Training subcategory models...")
-for cat in df["category"].unique():
-    sub_df = df[df["category"] == cat].copy()
-    if sub_df["subcategory"].nunique() > 1:
-        pipeline = Pipeline([("tfidf", TfidfVectorizer()), ("clf", MultinomialNB())])
-        pipeline.fit(sub_df["complaint_text"], sub_df["subcategory"])
-        joblib.dump(pipeline, SUBCATEGORY_MODELS_DIR / f"subcategory_{cat.lower()}.pkl")
-        logging.info(f"✅ Subcategory model for '{cat}' saved.")
+from paths import DATASET_PATH, TRAINED_DATA_DIR
+from ml_models.versions import current_version_dir, next_version_dir, publish_version, prune_versions
+
+# How many trained versions to keep on disk for rollback
+KEEP_MODEL_VERSIONS = int(os.getenv("KEEP_MODEL_VERSIONS", "3"))
+
+# Processes used to fit heads: 1 fits them in-process (the default), N uses
+# a pool of N spawned processes, 0 uses one per core. Only worth it on large
+# corpora; the bundled dataset trains fastest in-process.
+TRAIN_WORKERS = int(os.getenv("TRAIN_WORKERS", "1")) or os.cpu_count() or 1
+
+
+class TrainingReport:
+    """
+    Records wall-clock time and peak traced memory for each training stage.
+    tracemalloc only sees this process, so stages that run work in child
+    processes add the children's peaks to the dict the stage yields
+    ("worker_peak_mb").
+    """
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        extra = {}
+        try:
+            yield extra
+        finally:
+            seconds = time.perf_counter() - start
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            if started_tracing:
+                tracemalloc.stop()
+            record = {"stage": name, "seconds": round(seconds, 4), "peak_mb": round(peak_mb, 2)}
+            record.update({key: round(value, 2) for key, value in extra.items()})
+            self.stages.append(record)
+            workers = f", workers {extra['worker_peak_mb']:.1f} MB" if "worker_peak_mb" in extra else ""
+            logging.info(f"⏱️ {name}: {seconds:.3f}s, peak {peak_mb:.1f} MB{workers}")
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.stages}, f, indent=2)
+
+
+def load_dataset(dataset_path=DATASET_PATH):
+    try:
+        df = pd.read_csv(dataset_path)
+        logging.info("✅ Dataset loaded successfully.")
+        return df
+    except FileNotFoundError:
+        logging.error(f"❌ Dataset not found at {dataset_path}")
+        raise
+
+
+def train_head(counts, target, restrict_columns=False):
+    """
+    Fits one TF-IDF + MultinomialNB head on top of the shared count matrix.
+
+    Subcategory heads are given only the rows of their category and keep
+    just the vocabulary columns that occur in those rows
+    (`restrict_columns`). This reproduces exactly what a standalone
+    TfidfVectorizer fitted on the same slice would learn.
+    """
+    columns = None
+    if restrict_columns:
+        columns = np.flatnonzero(counts.getnnz(axis=0))
+        counts = counts[:, columns]
+
+    tfidf = TfidfTransformer().fit(counts)
+    clf = MultinomialNB().fit(tfidf.transform(counts), target)
+    return {"columns": columns, "tfidf": tfidf, "clf": clf}
+
+
+def _train_head_job(job):
+    name, counts, target, restrict_columns = job
+    return name, train_head(counts, target, restrict_columns)
+
+
+def _train_head_worker_job(job):
+    """_train_head_job in a pool process; also returns that process's peak traced bytes."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    name, head = _train_head_job(job)
+    return name, head, os.getpid(), tracemalloc.get_traced_memory()[1]
+
+
+def train_heads(jobs, workers=TRAIN_WORKERS, worker_peaks=None):
+    """
+    Fits (name, counts, target, restrict_columns) jobs, spreading them over
+    a process pool when more than one worker is allowed. The pool uses the
+    "spawn" start method, so it is safe to create from a threaded web
+    process. If `worker_peaks` is a dict, it is filled with each pool
+    process's peak traced memory in bytes, keyed by PID.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        return dict(map(_train_head_job, jobs))
+
+    context = multiprocessing.get_context("spawn")
+    trained = {}
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+        for name, head, pid, peak in pool.map(_train_head_worker_job, jobs):
+            trained[name] = head
+            if worker_peaks is not None:
+                worker_peaks[pid] = max(peak, worker_peaks.get(pid, 0))
+    return trained
+
+
+def partial_fit_head(head, counts, target):
+    """
+    Updates a fitted head with new rows via MultinomialNB.partial_fit.
+    The vocabulary and IDF weights stay as trained, so new terms are ignored
+    until the next full retrain. Rows with labels the head has never seen
+    are skipped, since partial_fit cannot add classes.
+    """
+    target = np.asarray(target)
+    known = np.isin(target, head["clf"].classes_)
+    if not known.all():
+        logging.warning(f"⚠ Skipping {(~known).sum()} rows with unseen labels: {sorted(set(target[~known]))}")
+
+    counts = counts[np.flatnonzero(known)]
+    if counts.shape[0] == 0:
+        return 0
+    if head["columns"] is not None:
+        counts = counts[:, head["columns"]]
+    head["clf"].partial_fit(head["tfidf"].transform(counts), target[known])
+    return counts.shape[0]
+
+
+def compile_head(head, n_features):
+    """
+    Flattens a trained head into plain arrays indexed by the shared vocabulary.
+    Columns the head never saw get an IDF of zero, which drops them from both
+    the TF-IDF norm and the class scores exactly like the original pipeline.
+    """
+    columns = head["columns"] if head["columns"] is not None else np.arange(n_features)
+    clf = head["clf"]
+
+    idf = np.zeros(n_features)
+    idf[columns] = head["tfidf"].idf_
+
+    feature_log_prob = np.zeros((len(clf.classes_), n_features))
+    feature_log_prob[:, columns] = clf.feature_log_prob_
+
+    return {
+        "classes": clf.classes_.astype(str),
+        "idf": idf,
+        "feature_log_prob": feature_log_prob,
+        "class_log_prior": clf.class_log_prior_,
+    }
+
+
+def compile_store(vectorizer, heads, subcategory_heads, store_dir):
+    """
+    Exports the fused model as a directory of raw .npy arrays plus a JSON
+    manifest. Serving workers open the arrays with np.load(mmap_mode="r"),
+    so every process on the host shares one page-cache copy.
+
+    Heads are stacked: `idf` has one row per head, while `feature_log_prob`
+    and `class_log_prior` have one row per class, located through each
+    head's `offset` in the manifest.
+    """
+    # Sorted terms (or hash buckets) for searchsorted lookups
+    vocabulary = np.asarray(vectorizer.get_feature_names_out())
+    if vocabulary.dtype == object:
+        vocabulary = vocabulary.astype(str)
+    named_heads = dict(heads)
+    named_heads.update({f"subcategory:{cat}": head for cat, head in subcategory_heads.items()})
+
+    compiled = [compile_head(head, len(vocabulary)) for head in named_heads.values()]
+    feature_spec = getattr(vectorizer, "feature_spec", None)
+    manifest = {
+        "format": 1,
+        "n_features": len(vocabulary),
+        "features": feature_spec() if feature_spec else {"type": "vocabulary"},
+        "heads": [],
+    }
+    offset = 0
+    for name, head in zip(named_heads, compiled):
+        manifest["heads"].append({"name": name, "classes": head["classes"].tolist(), "offset": offset})
+        offset += len(head["classes"])
+
+    np.save(store_dir / "vocabulary.npy", vocabulary)
+    np.save(store_dir / "idf.npy", np.vstack([head["idf"] for head in compiled]))
+    np.save(store_dir / "feature_log_prob.npy", np.vstack([head["feature_log_prob"] for head in compiled]))
+    np.save(store_dir / "class_log_prior.npy", np.concatenate([head["class_log_prior"] for head in compiled]))
+    with open(store_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def save_version(vectorizer, heads, subcategory_heads):
+    """
+    Writes the training state and compiled store as a new v{N}/ directory
+    and publishes it. Everything is staged in a scratch directory first, so
+    readers never see a half-written version.
+    """
+    tmp_dir = TRAINED_DATA_DIR / f"staging.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    joblib.dump(
+        {"vectorizer": vectorizer, "heads": heads, "subcategory_heads": subcategory_heads},
+        tmp_dir / "fused_model.pkl",
+    )
+    compile_store(vectorizer, heads, subcategory_heads, tmp_dir)
+
+    # Another process may publish the same version number first; renaming
+    # onto its directory fails, so take the next number instead
+    for _ in range(10):
+        version_dir = next_version_dir()
+        try:
+            os.rename(tmp_dir, version_dir)  # fails if version_dir exists and is non-empty
+            break
+        except OSError:
+            continue
     else:
-        logging.warning(f"⚠ Skipping subcategory model for '{cat}' (insufficient data).")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise RuntimeError("Could not claim a model version directory")
+    publish_version(version_dir)
+    prune_versions(KEEP_MODEL_VERSIONS)
+    return version_dir
+
+
+def train_all(dataset_path=DATASET_PATH, workers=TRAIN_WORKERS):
+    """
+    Trains every head on the dataset and exports the serving artifacts.
+    The corpus is tokenized once; heads are then fitted in parallel.
+    Safe to call from inside the app; nothing runs at import time.
+    """
+    report = TrainingReport()
+
+    with report.stage("load dataset"):
+        df = load_dataset(dataset_path)
+
+    # Ensure dirs
+    os.makedirs(TRAINED_DATA_DIR, exist_ok=True)
+
+    # Tokenize the corpus once with a vocabulary shared by every head
+    with report.stage("vectorize"):
+        vectorizer = CountVectorizer()
+        counts = vectorizer.fit_transform(df["complaint_text"])
+    logging.info(f"✅ Shared vocabulary built ({len(vectorizer.vocabulary_)} terms).")
+
+    jobs = [
+        ("category", counts, df["category"].to_numpy(), False),
+        ("urgency", counts, df["urgency"].to_numpy(), False),
+    ]
+    for cat in df["category"].unique():
+        rows = np.flatnonzero((df["category"] == cat).to_numpy())
+        if df["subcategory"].iloc[rows].nunique() > 1:
+            jobs.append((f"subcategory:{cat.lower()}", counts[rows], df["subcategory"].iloc[rows].to_numpy(), True))
+        else:
+            logging.warning(f"⚠ Skipping subcategory head for '{cat}' (insufficient data).")
+
+    logging.info(f"🔄 Training {len(jobs)} heads with up to {workers} worker(s)...")
+    with report.stage("fit heads") as stage:
+        worker_peaks = {}
+        trained = train_heads(jobs, workers, worker_peaks)
+        if worker_peaks:
+            # Pool processes run side by side, so their peaks add up
+            stage["worker_peak_mb"] = sum(worker_peaks.values()) / (1024 * 1024)
+
+    heads = {name: trained[name] for name in ("category", "urgency")}
+    subcategory_heads = {
+        name.split(":", 1)[1]: head for name, head in trained.items() if name.startswith("subcategory:")
+    }
 
-logging.info("🎉 Training complete.")
\ No newline at end of file
+    with report.stage("save version"):
+        version_dir = save_version(vectorizer, heads, subcategory_heads)
+    logging.info(f"✅ Fused model and compiled store saved to {version_dir}.")
+
+    report.save(version_dir / "training_report.json")
+    logging.info("🎉 Training complete.")
+    return version_dir
+
+
+def update_models(new_rows):
+    """
+    Folds new labelled rows (a DataFrame or CSV path with the training
+    columns) into the current version with partial_fit and publishes the
+    result as a new version, without re-tokenizing the full corpus.
+    """
+    report = TrainingReport()
+
+    version_dir = current_version_dir()
+    if version_dir is None:
+        raise FileNotFoundError("No trained model version to update; run train_all() first")
+
+    with report.stage("load state"):
+        state = joblib.load(version_dir / "fused_model.pkl")
+        df = new_rows if isinstance(new_rows, pd.DataFrame) else load_dataset(new_rows)
+
+    with report.stage("vectorize"):
+        counts = state["vectorizer"].transform(df["complaint_text"])
+
+    with report.stage("partial fit"):
+        heads, subcategory_heads = state["heads"], state["subcategory_heads"]
+        partial_fit_head(heads["category"], counts, df["category"])
+        partial_fit_head(heads["urgency"], counts, df["urgency"])
+        for cat in df["category"].unique():
+            head = subcategory_heads.get(cat.lower())
+            if head is None:
+                logging.warning(f"⚠ No subcategory head for '{cat}'; its rows need a full retrain.")
+                continue
+            rows = np.flatnonzero((df["category"] == cat).to_numpy())
+            partial_fit_head(head, counts[rows], df["subcategory"].iloc[rows])
+
+    with report.stage("save version"):
+        new_version_dir = save_version(state["vectorizer"], heads, subcategory_heads)
+
+    report.save(new_version_dir / "training_report.json")
+    logging.info(f"🎉 {len(df)} new rows folded into {new_version_dir.name} (from {version_dir.name}).")
+    return new_version_dir
+
+
+if __name__ == "__main__":
+    # Run from the project root: python -m ml_models.trainall
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="Train the complaint classification models.")
+    parser.add_argument("--update", metavar="CSV", help="fold new rows into the current version with partial_fit")
+    parser.add_argument("--workers", type=int, default=TRAIN_WORKERS, help="processes used to fit heads")
+    args = parser.parse_args()
+
+    if args.update:
+        update_models(args.update)
+    else:
+        train_all(workers=args.workers)
@@ -0,0 +1,60 @@
+import os
+import shutil
+import logging
+
+from paths import TRAINED_DATA_DIR, CURRENT_MODEL_POINTER
+
+logger = logging.getLogger("model-versions")
+
+# Versioned model directories live under TRAINED_DATA_DIR as v1/, v2/, ...
+# and CURRENT names the one that should be served.
+
+
+def list_versions():
+    """Returns the published version numbers, oldest first."""
+    if not TRAINED_DATA_DIR.exists():
+        return []
+    return sorted(
+        int(p.name[1:]) for p in TRAINED_DATA_DIR.iterdir()
+        if p.is_dir() and p.name.startswith("v") and p.name[1:].isdigit()
+    )
+
+
+def current_version_dir():
+    """
+    Returns the directory CURRENT points to, falling back to the newest
+    version on disk. Returns None when nothing has been trained yet.
+    """
+    if CURRENT_MODEL_POINTER.exists():
+        name = CURRENT_MODEL_POINTER.read_text(encoding="utf-8").strip()
+        if name and (TRAINED_DATA_DIR / name).is_dir():
+            return TRAINED_DATA_DIR / name
+
+    versions = list_versions()
+    return TRAINED_DATA_DIR / f"v{versions[-1]}" if versions else None
+
+
+def next_version_dir():
+    return TRAINED_DATA_DIR / f"v{max(list_versions(), default=0) + 1}"
+
+
+def publish_version(version_dir):
+    """Points CURRENT at `version_dir` with an atomic rename."""
+    tmp_pointer = CURRENT_MODEL_POINTER.with_name(f"{CURRENT_MODEL_POINTER.name}.{os.getpid()}.tmp")
+    tmp_pointer.write_text(version_dir.name, encoding="utf-8")
+    os.replace(tmp_pointer, CURRENT_MODEL_POINTER)
+    logger.info("✅ Published model version %s", version_dir.name)
+
+
+def prune_versions(keep=3):
+    """
+    Deletes all but the newest `keep` versions (never the current one).
+    Workers still memory-mapping a deleted version keep working, since
+    unlinked files stay readable until they are unmapped.
+    """
+    current = current_version_dir()
+    for version in list_versions()[:-keep]:
+        version_dir = TRAINED_DATA_DIR / f"v{version}"
+        if version_dir != current:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            logger.info("🗑️ Pruned model version %s", version_dir.name)
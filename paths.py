@@ -1,4 +1,5 @@
 # smart_complaint_box/paths.py
+import os
 from pathlib import Path
 
 # Base directory (root of the project)
@@ -11,8 +12,9 @@ DATABASE_DIR = BASE_DIR / "database"
 DOCS_DIR = BASE_DIR / "docs"
 FRONTEND_DIR = BASE_DIR / "frontend"
 ML_MODELS_DIR = BASE_DIR / "ml_models"
-TRAINED_DATA_DIR = ML_MODELS_DIR / "trained_data"
+TRAINED_DATA_DIR = Path(os.getenv("TRAINED_DATA_DIR", ML_MODELS_DIR / "trained_data"))
 SUBCATEGORY_MODELS_DIR = TRAINED_DATA_DIR / "subcategory_models"
+CURRENT_MODEL_POINTER = TRAINED_DATA_DIR / "CURRENT"
 DATASET_PATH = ML_MODELS_DIR / "dataset" / "complaints.csv"
 
 # Config files
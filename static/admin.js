@@ -6,8 +6,12 @@ const authMsg = document.getElementById('auth-message');
 const statusMsg = document.getElementById('status-message');
 const panel = document.getElementById('admin-panel-content');
 const tableBody = document.getElementById('complaints-table');
+const loadMoreBtn = document.getElementById('loadMoreBtn');
+const statsSummary = document.getElementById('stats-summary');
 
 let modifyKey = null;
+let adminKey = null;
+let nextCursor = null;
 
 function showAlert(el, message, type) {
   el.textContent = message;
@@ -33,6 +37,8 @@ verifyBtn.addEventListener('click', async () => {
       panel.style.display = 'block';
       showAlert(authMsg, 'Access granted.', 'success');
       modifyKey = data.permission_level === 'read-write' ? key : null;
+      adminKey = key;
+      loadStats();
       loadComplaints();
     } else showAlert(authMsg, data.error || 'Invalid key.', 'error');
   } catch (err) {
@@ -40,14 +46,30 @@ verifyBtn.addEventListener('click', async () => {
   }
 });
 
-async function loadComplaints() {
+async function loadStats() {
   try {
-    const res = await fetch('/all_complaints');
+    const res = await fetch('/stats', { headers: { 'X-Admin-Key': adminKey } });
+    const data = await res.json();
+    if (!res.ok) return;
+
+    const byStatus = Object.entries(data.by_status)
+      .map(([status, count]) => `${status}: ${count}`)
+      .join(' · ');
+    statsSummary.textContent = `Total: ${data.total}${byStatus ? ' · ' + byStatus : ''}`;
+  } catch (err) {
+    statsSummary.textContent = '';
+  }
+}
+
+async function loadComplaints(append = false) {
+  try {
+    const url = append && nextCursor ? `/all_complaints?cursor=${encodeURIComponent(nextCursor)}` : '/all_complaints';
+    const res = await fetch(url);
     const data = await res.json();
 
     if (res.ok) {
-      tableBody.innerHTML = '';
-      data.forEach((c) => {
+      if (!append) tableBody.innerHTML = '';
+      data.complaints.forEach((c) => {
         const row = document.createElement('tr');
         row.innerHTML = `
           <td>${c.complaint_id}</td>
@@ -67,12 +89,16 @@ async function loadComplaints() {
           </td>`;
         tableBody.appendChild(row);
       });
+      nextCursor = data.next_cursor;
+      loadMoreBtn.style.display = nextCursor ? 'inline-block' : 'none';
     } else showAlert(statusMsg, data.error || 'Failed to load.', 'error');
   } catch (err) {
     showAlert(statusMsg, err.message, 'error');
   }
 }
 
+loadMoreBtn.addEventListener('click', () => loadComplaints(true));
+
 async function updateComplaint(id, btn) {
   const row = btn.closest('tr');
   const status = row.querySelector('select').value;
@@ -85,8 +111,10 @@ async function updateComplaint(id, btn) {
       body: JSON.stringify({ complaint_id: id, modify_key: modifyKey, status, assigned_to: assignedTo }),
     });
     const data = await res.json();
-    if (res.ok && data.success) showAlert(statusMsg, data.message, 'success');
-    else showAlert(statusMsg, data.error || 'Update failed.', 'error');
+    if (res.ok && data.success) {
+      showAlert(statusMsg, data.message, 'success');
+      loadStats();
+    } else showAlert(statusMsg, data.error || 'Update failed.', 'error');
   } catch (err) {
     showAlert(statusMsg, err.message, 'error');
   }
@@ -105,6 +133,7 @@ async function deleteComplaint(id, btn) {
     if (res.ok && data.success) {
       btn.closest('tr').remove();
       showAlert(statusMsg, data.message, 'success');
+      loadStats();
     } else showAlert(statusMsg, data.error || 'Delete failed.', 'error');
   } catch (err) {
     showAlert(statusMsg, err.message, 'error');
@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Project modules read these at import time; keep tests away from the real
+# trained_data/ and database
+_scratch = tempfile.mkdtemp(prefix="scb-tests-")
+os.environ.setdefault("TRAINED_DATA_DIR", str(Path(_scratch) / "trained_data"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(_scratch) / 'tests.db'}")
+os.environ["BACKGROUND_SERVICES"] = "false"
+
+
+@pytest.fixture
+def app(tmp_path):
+    """A bare Flask app bound to an empty SQLite database."""
+    from flask import Flask
+    from database.models import db
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'complaints.db'}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
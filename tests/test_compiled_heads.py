@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+
+from benchmarks.corpus import synthetic_corpus
+from backend.classifier import CompiledHead, CompiledScorer
+from ml_models.trainall import train_head, compile_head, compile_store
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    df = synthetic_corpus(1500, seed=11)
+    vectorizer = CountVectorizer()
+    counts = vectorizer.fit_transform(df["complaint_text"])
+    return df, vectorizer, counts
+
+
+def flat_triples(counts):
+    coo = counts.tocoo()
+    order = np.lexsort((coo.col, coo.row))
+    return coo.row[order], coo.col[order], coo.data[order].astype(np.float64)
+
+
+def sklearn_predict(head, counts):
+    if head["columns"] is not None:
+        counts = counts[:, head["columns"]]
+    return head["clf"].predict(head["tfidf"].transform(counts))
+
+
+@pytest.mark.parametrize("target", ["category", "urgency"])
+def test_compiled_head_matches_sklearn(corpus, target):
+    df, vectorizer, counts = corpus
+    head = train_head(counts, df[target].to_numpy())
+    compiled = compile_head(head, counts.shape[1])
+    scorer = CompiledHead(
+        compiled["classes"], compiled["idf"], compiled["feature_log_prob"], compiled["class_log_prior"]
+    )
+
+    predicted = scorer.classes[scorer.predict(*flat_triples(counts), counts.shape[0])]
+    np.testing.assert_array_equal(predicted, sklearn_predict(head, counts).astype(str))
+
+
+def test_restricted_subcategory_head_matches_sklearn(corpus):
+    df, vectorizer, counts = corpus
+    category = df["category"].iloc[0]
+    rows = np.flatnonzero((df["category"] == category).to_numpy())
+    head = train_head(counts[rows], df["subcategory"].iloc[rows].to_numpy(), restrict_columns=True)
+    compiled = compile_head(head, counts.shape[1])
+    scorer = CompiledHead(
+        compiled["classes"], compiled["idf"], compiled["feature_log_prob"], compiled["class_log_prior"]
+    )
+
+    subset = counts[rows]
+    predicted = scorer.classes[scorer.predict(*flat_triples(subset), subset.shape[0])]
+    np.testing.assert_array_equal(predicted, sklearn_predict(head, subset).astype(str))
+
+
+def test_compiled_store_round_trip(corpus, tmp_path):
+    df, vectorizer, counts = corpus
+    heads = {name: train_head(counts, df[name].to_numpy()) for name in ("category", "urgency")}
+    compile_store(vectorizer, heads, {}, tmp_path)
+    scorer = CompiledScorer.load(tmp_path)
+
+    texts = df["complaint_text"].tolist()[:200]
+    expected = {name: sklearn_predict(head, vectorizer.transform(texts)).astype(str) for name, head in heads.items()}
+    predictions = scorer.predict_batch(texts)
+    assert [p[0] for p in predictions] == list(expected["category"])
+    assert [p[2] for p in predictions] == list(expected["urgency"])
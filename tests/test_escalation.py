@@ -0,0 +1,48 @@
+import pytest
+
+from backend import escalation
+
+
+@pytest.mark.skipif(escalation.fcntl is None, reason="file locks need fcntl")
+def test_one_process_per_lock_file_scans(tmp_path, monkeypatch):
+    lock_path = tmp_path / "escalation.lock"
+    monkeypatch.setattr(escalation, "ESCALATION_LOCK_FILE", lock_path)
+    monkeypatch.setattr(escalation, "_lock_file", None)
+
+    # Another worker holds the lock: this one waits its turn
+    with open(lock_path, "a") as holder:
+        escalation.fcntl.flock(holder, escalation.fcntl.LOCK_EX | escalation.fcntl.LOCK_NB)
+        assert not escalation._is_leader()
+    # ...and takes over once it is released, keeping it from then on
+    assert escalation._is_leader()
+    assert escalation._is_leader()
+    escalation._lock_file.close()
+
+
+def _overdue_complaint(complaint_id, urgency, hours_old):
+    from datetime import timedelta
+    from database.models import db, Complaint
+    from backend.storage import now_utc, save_complaint
+
+    save_complaint(complaint_id, "Transformer sparking", "Electricity", "Power Outage", urgency, "power@example.com")
+    created_at = (now_utc() - timedelta(hours=hours_old)).replace(tzinfo=None)
+    Complaint.query.filter_by(complaint_id=complaint_id).update({"created_at": created_at})
+    db.session.commit()
+
+
+def test_complaints_go_straight_to_the_highest_level_due(app):
+    from database.models import Complaint, StatusLog, OutboundEmail
+
+    deadlines = escalation.DEFAULT_CONFIG["deadlines_hours"]["High"]
+    _overdue_complaint("PAST-BOTH", "High", deadlines["level3"] + 1)
+    _overdue_complaint("PAST-ONE", "High", deadlines["level2"] + 1)
+
+    assert escalation.scan_once(config=escalation.DEFAULT_CONFIG) == 2
+    levels = {c.complaint_id: c.escalation_level for c in Complaint.query.all()}
+    assert levels == {"PAST-BOTH": 3, "PAST-ONE": 2}
+    for complaint_id, level in levels.items():
+        logs = [log.status for log in StatusLog.query.filter_by(complaint_id=complaint_id)]
+        assert logs == ["Pending", f"Escalated L{level}"]
+        assert OutboundEmail.query.filter_by(complaint_id=complaint_id).count() == 1
+
+    assert escalation.scan_once(config=escalation.DEFAULT_CONFIG) == 0
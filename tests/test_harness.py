@@ -0,0 +1,53 @@
+import pytest
+
+from benchmarks import harness
+
+
+@pytest.fixture
+def baseline_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(harness, "BASELINE_DIR", tmp_path)
+    return tmp_path
+
+
+def _results(**metrics):
+    results = harness.Results()
+    for name, (value, unit, better) in metrics.items():
+        results.add(name, value, unit, better)
+    return results
+
+
+def test_counts_regress_on_any_rise_from_zero(baseline_dir):
+    harness.save_baseline(_results(locked=(0, "errors", "lower"), overhead=(0, "us", "lower")), "zero")
+
+    assert harness.compare(_results(locked=(0, "errors", "lower"), overhead=(0, "us", "lower")), "zero", 0.25) == []
+    regressions = harness.compare(_results(locked=(3, "errors", "lower"), overhead=(0.4, "us", "lower")), "zero", 0.25)
+    assert regressions == ["locked: 0 -> 3 errors"]
+
+
+def test_regressions_respect_direction_and_tolerance(baseline_dir):
+    harness.save_baseline(_results(latency=(10, "ms", "lower"), rate=(100, "rows/s", "higher")), "base")
+
+    assert harness.compare(_results(latency=(12, "ms", "lower"), rate=(90, "rows/s", "higher")), "base", 0.25) == []
+    regressions = harness.compare(_results(latency=(15, "ms", "lower"), rate=(50, "rows/s", "higher")), "base", 0.25)
+    assert [message.split(":")[0] for message in regressions] == ["latency", "rate"]
+
+
+def test_missing_baseline_raises(baseline_dir):
+    with pytest.raises(FileNotFoundError):
+        harness.compare(_results(), "absent", 0.25)
+
+
+def test_baselines_only_compare_runs_with_the_same_settings(baseline_dir):
+    settings = {"sizes": [10000], "db_rows": 10000, "workers": 1}
+    recorded = harness.Results(settings)
+    recorded.add("latency", 10, "ms")
+    harness.save_baseline(recorded, "settings")
+
+    same = harness.Results(dict(settings))
+    same.add("latency", 10, "ms")
+    assert harness.compare(same, "settings", 0.25) == []
+
+    smaller = harness.Results({**settings, "db_rows": 2000})
+    smaller.add("latency", 30, "ms")
+    with pytest.raises(ValueError, match="db_rows"):
+        harness.compare(smaller, "settings", 0.25)
@@ -0,0 +1,99 @@
+import re
+
+import pytest
+
+from backend import ids
+
+
+def test_sortable_ids_are_unique_ordered_and_well_formed():
+    generate = ids.SortableIdGenerator(node=7)
+    batch = [generate() for _ in range(20000)]
+    assert len(set(batch)) == len(batch)
+    assert batch == sorted(batch)
+    assert all(re.fullmatch(f"[{ids.CROCKFORD_ALPHABET}]{{{ids.ID_LENGTH}}}", value) for value in batch)
+
+
+def test_nodes_never_collide_in_the_same_millisecond(monkeypatch):
+    monkeypatch.setattr(ids.time, "time", lambda: 1750000000.0)
+    first, second = ids.SortableIdGenerator(node=1), ids.SortableIdGenerator(node=2)
+    a = {first() for _ in range(3000)}
+    b = {second() for _ in range(3000)}
+    assert len(a) == len(b) == 3000
+    assert not a & b
+
+
+def test_ids_cannot_be_derived_from_time_and_node(monkeypatch):
+    monkeypatch.setattr(ids.time, "time", lambda: 1750000000.0)
+    first, second = ids.SortableIdGenerator(node=5)(), ids.SortableIdGenerator(node=5)()
+    # Same millisecond, node and sequence: only the random low bits differ
+    prefix = (ids.ID_LENGTH * 5 - ids.RANDOM_BITS) // 5
+    assert first[:prefix] == second[:prefix]
+    assert first != second
+
+
+def test_sequence_overflow_and_clock_step_back_stay_ordered(monkeypatch):
+    now = [1750000000.0]
+    monkeypatch.setattr(ids.time, "time", lambda: now[0])
+    generate = ids.SortableIdGenerator(node=3)
+    batch = [generate() for _ in range(3 * (1 << ids.SEQUENCE_BITS))]
+    now[0] -= 5  # clock steps back
+    batch += [generate() for _ in range(100)]
+    assert batch == sorted(batch)
+    assert len(set(batch)) == len(batch)
+
+
+def test_normalize_complaint_id():
+    assert ids.normalize_complaint_id(" 0abcioL ") == "0ABC101"
+    assert ids.normalize_complaint_id("1a2b3c4d") == "1A2B3C4D"
+
+
+def test_load_generator():
+    assert ids.load_generator("random") is ids.random_id
+    assert ids.load_generator("backend.ids:random_id") is ids.random_id
+    with pytest.raises(ValueError):
+        ids.load_generator("no-such-scheme")
+
+
+def test_node_defaults_to_a_random_value_unless_configured(monkeypatch):
+    monkeypatch.delenv("COMPLAINT_ID_NODE", raising=False)
+    monkeypatch.setattr(ids.random.SystemRandom, "randrange", lambda self, n: 4321)
+    assert ids.SortableIdGenerator()._node() == 4321
+
+    monkeypatch.setenv("COMPLAINT_ID_NODE", "12")
+    assert ids.SortableIdGenerator()._node() == 12
+
+
+def test_only_duplicate_complaint_ids_count_as_collisions(app):
+    from sqlalchemy.exc import IntegrityError
+    from database.models import db, StatusLog
+    from backend.storage import save_complaint, is_complaint_id_collision
+
+    args = ("Streetlight out", "Electricity", "Streetlight", "Low", "power@example.com")
+    save_complaint("DUPLICATE", *args)
+    with pytest.raises(IntegrityError) as duplicate:
+        save_complaint("DUPLICATE", *args)
+    db.session.rollback()
+    assert is_complaint_id_collision(duplicate.value)
+
+    db.session.add(StatusLog(complaint_id="DUPLICATE", status=None, assigned_to="power@example.com"))
+    with pytest.raises(IntegrityError) as not_null:
+        db.session.commit()
+    db.session.rollback()
+    assert not is_complaint_id_collision(not_null.value)
+
+
+def test_submit_retries_with_a_fresh_id_after_a_collision(app, monkeypatch):
+    from backend.blueprints import user
+    from backend.storage import save_complaint
+
+    save_complaint("TAKEN", "Water leak", "Water", "Leak", "High", "water@example.com")
+    issued = iter(["TAKEN", "FRESH"])
+    monkeypatch.setattr(user, "new_complaint_id", lambda: next(issued))
+    app.register_blueprint(user.user_bp)
+
+    response = app.test_client().post("/submit", json={
+        "complaint_text": "Pipe burst on Main Street", "urgency": "High", "category": "Water",
+        "subcategory": "Leak", "assigned_to": "water@example.com",
+    })
+    assert response.status_code == 200
+    assert response.get_json()["complaint_id"] == "FRESH"
@@ -0,0 +1,99 @@
+import socket
+from types import SimpleNamespace
+
+import pytest
+
+from backend.mail_queue import group_messages
+
+
+def _email(to_email, subject, attempts=1, digestible=True):
+    return SimpleNamespace(
+        to_email=to_email, subject=subject, body=f"{subject} body", attempts=attempts, digestible=digestible,
+    )
+
+
+def test_digests_group_first_attempts_per_recipient():
+    emails = [
+        _email("roads@example.com", "Pothole"),
+        _email("water@example.com", "Leak"),
+        _email("roads@example.com", "Streetlight"),
+        _email("roads@example.com", "Retry", attempts=2),
+    ]
+    messages = group_messages(emails, digest=True)
+
+    by_recipient = {}
+    for subject, body, to_email, group in messages:
+        by_recipient.setdefault(to_email, []).append(group)
+    # The retry goes out on its own; the two first attempts share one digest
+    assert sorted(len(group) for group in by_recipient["roads@example.com"]) == [1, 2]
+    assert by_recipient["water@example.com"] == [[emails[1]]]
+    digest = next(m for m in messages if len(m[3]) == 2)
+    assert "Pothole body" in digest[1] and "Streetlight body" in digest[1]
+
+
+def test_escalation_emails_are_never_digested(app):
+    from datetime import timedelta
+    from backend.storage import (
+        claim_due_emails, enqueue_email, escalate_complaints, find_overdue, now_utc, save_complaint,
+    )
+
+    save_complaint("ESCALATED", "Pothole", "Roads", "Potholes", "Low", "roads@example.com")
+    row = find_overdue("Pending", "Low", 1, now_utc() + timedelta(seconds=1), 10)[0]
+    escalate_complaints([(row, 2, "head@example.com", ("head@example.com", "Escalated to level 2", "Overdue"))])
+    enqueue_email("head@example.com", "Streetlight", "Streetlight body")
+    enqueue_email("head@example.com", "Drain", "Drain body", delay_seconds=300)
+
+    emails = claim_due_emails(10, 60, include_pending_for_recipients=True)
+    assert len(emails) == 3
+    subjects = sorted(
+        [email.subject for email in group] for _, _, _, group in group_messages(emails, digest=True)
+    )
+    assert subjects == [["Escalated to level 2"], ["Streetlight", "Drain"]]
+
+
+def test_without_digests_every_email_is_its_own_message():
+    emails = [_email("roads@example.com", f"Complaint {i}") for i in range(3)]
+    messages = group_messages(emails, digest=False)
+    assert [(subject, to_email, group) for subject, _, to_email, group in messages] == [
+        (email.subject, email.to_email, [email]) for email in emails
+    ]
+
+
+class _Inbox:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def _accept_any(server, session, envelope, mechanism, auth_data):
+    from aiosmtpd.smtp import AuthResult
+
+    return AuthResult(success=True)
+
+
+def test_send_many_delivers_over_one_connection():
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    from backend.email_sender import RealEmailSender
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    inbox = _Inbox()
+    controller = controller_module.Controller(
+        inbox, hostname="127.0.0.1", port=port,
+        authenticator=_accept_any, auth_require_tls=False,
+    )
+    controller.start()
+    try:
+        sender = RealEmailSender("127.0.0.1", port, "test", "test", security="none", pool_size=1)
+        results = sender.send_many([(f"Complaint {i}", "Body", f"dept{i}@example.com") for i in range(3)])
+        sender.pool.close()
+    finally:
+        controller.stop()
+
+    assert results == [True, True, True]
+    assert inbox.messages == [[f"dept{i}@example.com"] for i in range(3)]
+    assert sender.pool.connections_opened == 1
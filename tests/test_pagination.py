@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.models import db, Complaint
+from backend.storage import page_complaints, decode_cursor
+
+
+@pytest.fixture
+def complaints(app):
+    """30 complaints in 10 timestamps, three per timestamp, to exercise ties."""
+    base = datetime(2025, 1, 1, 12, 0, 0)
+    rows = [
+        {
+            "complaint_id": f"C{i:03d}", "user_input": "test", "category": "Water", "subcategory": "Leakage",
+            "urgency": "High" if i % 3 == 0 else "Low", "status": "Pending", "assigned_to": "a@example.com",
+            "created_at": base + timedelta(minutes=i // 3), "updated_at": base,
+        }
+        for i in range(30)
+    ]
+    db.session.execute(Complaint.__table__.insert(), rows)
+    db.session.commit()
+    return sorted(rows, key=lambda row: (row["created_at"], row["complaint_id"]), reverse=True)
+
+
+def collect(limit, **filters):
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = page_complaints(["complaint_id"], limit=limit, cursor=cursor, **filters)
+        seen.extend(row.complaint_id for row in rows)
+        pages += 1
+        if cursor is None:
+            return seen, pages
+
+
+@pytest.mark.parametrize("limit", [1, 4, 7, 30, 100])
+def test_pages_cover_every_row_once_in_order(complaints, limit):
+    seen, pages = collect(limit)
+    assert seen == [row["complaint_id"] for row in complaints]
+    assert pages == max(1, -(-len(complaints) // limit))
+
+
+def test_filtered_pages(complaints):
+    seen, _ = collect(4, urgency="High")
+    assert seen == [row["complaint_id"] for row in complaints if row["urgency"] == "High"]
+
+
+def test_cursor_stays_valid_after_newer_inserts(complaints):
+    first, cursor = page_complaints(["complaint_id"], limit=5)
+    db.session.execute(Complaint.__table__.insert(), {
+        "complaint_id": "NEW", "user_input": "test", "category": "Water", "subcategory": "Leakage",
+        "urgency": "Low", "status": "Pending", "created_at": datetime(2030, 1, 1),
+    })
+    second, _ = page_complaints(["complaint_id"], limit=5, cursor=cursor)
+    assert [row.complaint_id for row in second] == [row["complaint_id"] for row in complaints[5:10]]
+
+
+def test_invalid_cursor_and_filter(app):
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        page_complaints(["complaint_id"], user_input="x")
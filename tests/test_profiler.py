@@ -0,0 +1,34 @@
+import time
+import threading
+
+from backend import profiler
+
+
+def test_control_endpoints_never_use_the_request_budget():
+    session = profiler.ProfileSession(mode="cprofile", requests=1)
+    assert not session.begin("admin_bp.start_profiler")
+    assert not session.begin("admin_bp.stop_profiler")
+    assert session.begin("user.predict")
+    session.end()
+    assert session.requests == 1 and session.done
+
+
+def test_finish_waits_for_the_traced_request():
+    session = profiler.ProfileSession(mode="cprofile")
+    started, ended = threading.Event(), []
+
+    def traced_request():
+        assert session.begin("user.predict")
+        started.set()
+        time.sleep(0.2)
+        ended.append(True)
+        session.end()
+
+    thread = threading.Thread(target=traced_request)
+    thread.start()
+    started.wait()
+    session.finish()
+    assert ended == [True]
+    assert not session.begin("user.predict")
+    assert session.pstats()
+    thread.join()
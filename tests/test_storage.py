@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from database.models import db, OutboundEmail
+from backend import storage
+from backend.storage import delete_complaint, save_complaint
+
+
+def test_deleting_a_complaint_cancels_its_queued_emails(app):
+    save_complaint(
+        "DEAD", "Garbage not collected", "Sanitation", "Garbage", "Medium", "sanitation@example.com",
+        notifications=[("sanitation@example.com", "New complaint", "Body")], notification_delay=300,
+    )
+    save_complaint(
+        "KEPT", "Garbage not collected", "Sanitation", "Garbage", "Medium", "sanitation@example.com",
+        notifications=[("sanitation@example.com", "New complaint", "Body")],
+    )
+    sent = OutboundEmail(complaint_id="DEAD", to_email="x@example.com", subject="Old", body="Old", status="sent")
+    db.session.add(sent)
+    db.session.commit()
+
+    assert delete_complaint("DEAD")
+    remaining = {(email.complaint_id, email.status) for email in OutboundEmail.query.all()}
+    assert remaining == {("KEPT", "queued"), ("DEAD", "sent")}
+
+
+def assert_stats_match_a_rebuild():
+    incremental = storage.get_stats()
+    storage.rebuild_stats()
+    assert storage.get_stats() == incremental
+
+
+def test_every_write_keeps_stats_in_step_with_the_complaints(app):
+    water = ("Water", "Leakage", "High", "water@example.com")
+    save_complaint("C1", "Pipe burst", *water)
+    save_complaint("C2", "Low pressure", "Water", "Pressure", "Low", "water@example.com")
+    assert_stats_match_a_rebuild()
+
+    storage.bulk_save_complaints([
+        {"complaint_id": f"B{i}", "user_input": "Garbage", "category": "Sanitation", "subcategory": "Garbage",
+         "urgency": "Medium", "assigned_to": "sanitation@example.com"}
+        for i in range(5)
+    ])
+    assert_stats_match_a_rebuild()
+
+    storage.update_status("C1", "In Progress", assigned_to="crew@example.com")
+    storage.update_status("B1", "Resolved")
+    assert_stats_match_a_rebuild()
+
+    storage.update_complaint("C2", {
+        "status": "Resolved", "category": "Roads", "subcategory": "Potholes", "urgency": "High",
+        "assigned_to": "roads@example.com",
+    })
+    assert_stats_match_a_rebuild()
+
+    assert delete_complaint("B2")
+    assert_stats_match_a_rebuild()
+
+    rows = storage.find_overdue("Pending", "Medium", 1, storage.now_utc() + timedelta(seconds=1), 10)
+    escalated = storage.escalate_complaints([
+        (row, 2, "head@example.com", ("head@example.com", "Escalated", "Overdue")) for row in rows
+    ])
+    assert len(escalated) == 3
+    assert_stats_match_a_rebuild()
+
+    stats = storage.get_stats()
+    assert stats["total"] == 6
+    assert stats["by_department"]["head@example.com"] == 3